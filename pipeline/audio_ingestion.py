@@ -8,8 +8,10 @@ from pathlib import Path
 from typing import Tuple, Optional
 import soundfile as sf
 from pydub import AudioSegment
-import tempfile
 import os
+import shutil
+import subprocess
+from functools import lru_cache
 
 from utils.logger import get_logger
 from utils.file_utils import get_file_utils
@@ -32,8 +34,13 @@ class AudioIngestion:
         
         logger.info(f"Loading audio file: {audio_file_path}")
         
-        # Load audio
-        audio, sample_rate = sf.read(audio_file_path)
+        # Load audio (float32 straight from libsndfile, no float64 round-trip)
+        try:
+            audio, sample_rate = sf.read(audio_file_path, dtype='float32')
+        except Exception as e:
+            # Formats libsndfile can't decode go through ffmpeg, already mono at the target rate
+            logger.info(f"Soundfile could not read {audio_file_path} ({e}), decoding with ffmpeg")
+            audio, sample_rate = self._load_with_ffmpeg(Path(audio_file_path))
         logger.info(f"Original audio: shape={audio.shape}, sample_rate={sample_rate}")
         
         # Ensure mono (convert stereo to mono)
@@ -51,20 +58,19 @@ class AudioIngestion:
             audio = resample_poly(audio, self.target_sample_rate, sample_rate)
             sample_rate = self.target_sample_rate
         
-        # Normalize amplitude to [-1, 1]
+        # Normalize amplitude to [-1, 1], scaling straight into a float32 array
         max_val = np.max(np.abs(audio))
         if max_val > 0:
-            audio = audio / max_val
+            audio = np.multiply(audio, 1.0 / max_val, dtype=np.float32)
             logger.info(f"Normalized audio amplitude (max was {max_val:.4f})")
+        else:
+            audio = audio.astype(np.float32)
         
-        # Apply noise gate
+        # Apply noise gate (in place on the float32 array, no further copy)
         if self.noise_gate_threshold > 0:
             audio[np.abs(audio) < self.noise_gate_threshold] = 0
             logger.info(f"Applied noise gate with threshold {self.noise_gate_threshold}")
         
-        # Ensure float32 dtype
-        audio = audio.astype(np.float32)
-        
         duration = len(audio) / sample_rate
         file_size = os.path.getsize(audio_file_path)
         
@@ -109,26 +115,20 @@ class AudioIngestion:
         if not audio_path.exists():
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        # Get file extension
-        ext = audio_path.suffix.lower()
-        
         try:
-            if ext in ['.wav', '.flac']:
-                # Direct loading for supported formats
-                audio_data, sample_rate = self._load_with_soundfile(audio_path)
-            else:
-                # Use pydub for other formats
-                audio_data, sample_rate = self._load_with_pydub(audio_path)
+            # Decode in-process with libsndfile (WAV, FLAC, OGG and, with libsndfile >= 1.1, MP3);
+            # only formats it can't read (M4A, AAC, ...) fall back to ffmpeg
+            audio_data, sample_rate = self._load_with_soundfile(audio_path)
             
             # Normalize audio
             normalized_audio = self._normalize_audio(audio_data, sample_rate)
             
             logger.info(f"Successfully loaded and normalized audio | "
-                       f"Duration: {len(normalized_audio) / self.target_sr:.2f}s | "
-                       f"Sample rate: {self.target_sr}Hz | "
+                       f"Duration: {len(normalized_audio) / self.target_sample_rate:.2f}s | "
+                       f"Sample rate: {self.target_sample_rate}Hz | "
                        f"Channels: 1 (mono)")
             
-            return normalized_audio, self.target_sr
+            return normalized_audio, self.target_sample_rate
             
         except Exception as e:
             logger.error(f"Error loading audio file {audio_path}: {e}")
@@ -136,7 +136,7 @@ class AudioIngestion:
     
     def _load_with_soundfile(self, audio_path: Path) -> Tuple[np.ndarray, int]:
         """
-        Load audio using soundfile (for WAV, FLAC)
+        Load audio using soundfile, falling back to ffmpeg for unsupported formats
         
         Args:
             audio_path: Path to audio file
@@ -145,12 +145,51 @@ class AudioIngestion:
             Tuple of (audio_data, sample_rate)
         """
         try:
-            audio_data, sample_rate = sf.read(str(audio_path))
+            audio_data, sample_rate = sf.read(str(audio_path), dtype='float32')
             logger.debug(f"Loaded with soundfile | Shape: {audio_data.shape} | SR: {sample_rate}")
             return audio_data, sample_rate
         except Exception as e:
-            logger.warning(f"Soundfile loading failed, falling back to pydub: {e}")
+            logger.warning(f"Soundfile loading failed, falling back to ffmpeg: {e}")
+            return self._load_with_ffmpeg(audio_path)
+    
+    def _load_with_ffmpeg(self, audio_path: Path) -> Tuple[np.ndarray, int]:
+        """
+        Decode audio by piping raw 16-bit PCM out of ffmpeg (for MP3, M4A, etc.)
+        
+        ffmpeg downmixes and resamples while decoding, and the PCM bytes go
+        straight into a numpy buffer with no intermediate WAV or pydub object.
+        Falls back to pydub when no ffmpeg binary is on PATH.
+        
+        Args:
+            audio_path: Path to audio file
+            
+        Returns:
+            Tuple of (audio_data, sample_rate)
+        """
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            logger.debug("ffmpeg not found on PATH, decoding with pydub")
             return self._load_with_pydub(audio_path)
+        
+        command = [
+            ffmpeg, "-nostdin", "-v", "error",
+            "-i", str(audio_path),
+            "-f", "f32le", "-acodec", "pcm_f32le",
+            "-ac", "1", "-ar", str(self.target_sample_rate),
+            "-"
+        ]
+        try:
+            process = subprocess.run(command, capture_output=True, check=True)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"ffmpeg decoding failed: {e.stderr.decode(errors='ignore').strip()}")
+            raise
+        
+        # Float PCM keeps the source's full precision and needs no int16 rescaling pass;
+        # astype copies into a writable native-order array for the in-place steps downstream
+        audio_data = np.frombuffer(process.stdout, dtype="<f4").astype(np.float32)
+        
+        logger.debug(f"Loaded with ffmpeg | Shape: {audio_data.shape} | SR: {self.target_sample_rate}")
+        return audio_data, self.target_sample_rate
     
     def _load_with_pydub(self, audio_path: Path) -> Tuple[np.ndarray, int]:
         """
@@ -163,22 +202,18 @@ class AudioIngestion:
             Tuple of (audio_data, sample_rate)
         """
         try:
-            # Load with pydub
-            audio_segment = AudioSegment.from_file(str(audio_path))
+            # Let ffmpeg downmix and resample while decoding, so the samples come out
+            # as 16kHz mono and no later stage has to resample again
+            audio_segment = AudioSegment.from_file(
+                str(audio_path),
+                parameters=["-ac", "1", "-ar", str(self.target_sample_rate)]
+            )
+            # No-ops when ffmpeg already converted (pydub skips ffmpeg for plain WAV)
+            audio_segment = audio_segment.set_channels(1).set_frame_rate(self.target_sample_rate)
             
-            # Convert to numpy array
-            audio_data = np.array(audio_segment.get_array_of_samples(), dtype=np.float32)
-            
-            # Handle stereo to mono conversion
-            if audio_segment.channels == 2:
-                audio_data = audio_data.reshape((-1, 2))
-                audio_data = audio_data.mean(axis=1)
-            
-            # Normalize to [-1, 1]
-            if audio_data.dtype == np.int16:
-                audio_data = audio_data / 32768.0
-            elif audio_data.dtype == np.int32:
-                audio_data = audio_data / 2147483648.0
+            # Convert to numpy array normalized to [-1, 1]
+            full_scale = float(1 << (8 * audio_segment.sample_width - 1))
+            audio_data = np.array(audio_segment.get_array_of_samples(), dtype=np.float32) / full_scale
             
             sample_rate = audio_segment.frame_rate
             
@@ -208,16 +243,15 @@ class AudioIngestion:
                 audio_data = audio_data[:, 0]
         
         # Resample if necessary
-        if sample_rate != self.target_sr:
-            audio_data = self._resample_audio(audio_data, sample_rate, self.target_sr)
+        if sample_rate != self.target_sample_rate:
+            audio_data = self._resample_audio(audio_data, sample_rate, self.target_sample_rate)
         
-        # Normalize amplitude to [-1, 1]
+        # Normalize amplitude to [-1, 1], scaling straight into a float32 array
         max_val = np.max(np.abs(audio_data))
         if max_val > 0:
-            audio_data = audio_data / max_val
-        
-        # Convert to float32
-        audio_data = audio_data.astype(np.float32)
+            audio_data = np.multiply(audio_data, 1.0 / max_val, dtype=np.float32)
+        else:
+            audio_data = audio_data.astype(np.float32)
         
         # Apply light noise gate to reduce background noise
         audio_data = self._apply_noise_gate(audio_data)
@@ -237,13 +271,13 @@ class AudioIngestion:
             Resampled audio data
         """
         try:
-            import librosa
-            resampled = librosa.resample(audio_data, orig_sr=orig_sr, target_sr=target_sr)
+            from scipy.signal import resample_poly
+            resampled = resample_poly(audio_data, target_sr, orig_sr)
             logger.debug(f"Resampled audio from {orig_sr}Hz to {target_sr}Hz")
-            return resampled
+            return resampled.astype(np.float32)
         except ImportError:
             # Fallback: simple decimation/interpolation
-            logger.warning("librosa not available, using simple resampling")
+            logger.warning("scipy not available, using simple resampling")
             ratio = target_sr / orig_sr
             new_length = int(len(audio_data) * ratio)
             indices = np.linspace(0, len(audio_data) - 1, new_length)
@@ -262,17 +296,31 @@ class AudioIngestion:
             Audio data with noise gate applied
         """
         # Simple noise gate: zero out samples below threshold
+        audio_data = np.asarray(audio_data, dtype=np.float32)
         mask = np.abs(audio_data) > threshold
-        audio_data = audio_data * mask
         
         # Smooth transitions to avoid clicks
-        kernel_size = int(0.001 * self.target_sr)  # 1ms smoothing
-        if kernel_size > 1:
-            kernel = np.ones(kernel_size) / kernel_size
-            mask_smooth = np.convolve(mask.astype(float), kernel, mode='same')
-            audio_data = audio_data * mask_smooth
-        
-        return audio_data
+        kernel_size = int(0.001 * self.target_sample_rate)  # 1ms smoothing
+        if kernel_size <= 1:
+            return np.where(mask, audio_data, np.float32(0.0))
+        
+        # Moving average of the mask from a running count, equal to
+        # np.convolve(mask, ones(k) / k, mode='same') but O(N) and in float32:
+        # window[n] = extended[n + k] - extended[n]
+        counts = np.zeros(len(mask) + 1, dtype=np.int32)
+        np.cumsum(mask, out=counts[1:])
+        right = (kernel_size - 1) // 2
+        extended = np.concatenate((
+            np.zeros(kernel_size - 1 - right, dtype=np.int32),
+            counts,
+            np.full(right, counts[-1], dtype=np.int32)
+        ))
+        gain = (extended[kernel_size:] - extended[:len(mask)]).astype(np.float32)
+        gain *= np.float32(1.0 / kernel_size)
+        gain[~mask] = 0.0
+        gain *= audio_data
+        
+        return gain
     
     def save_normalized_audio(self, audio_data: np.ndarray, output_path: str) -> None:
         """
@@ -282,7 +330,7 @@ class AudioIngestion:
             audio_data: Normalized audio data
             output_path: Path to save the audio file
         """
-        self.file_utils.save_audio(audio_data, output_path, self.target_sr)
+        self.file_utils.save_audio(audio_data, output_path, self.target_sample_rate)
         logger.debug(f"Saved normalized audio to: {output_path}")
     
     def get_audio_info(self, audio_path: str) -> dict:
@@ -298,12 +346,12 @@ class AudioIngestion:
         try:
             audio_data, sample_rate = self.load_and_normalize(audio_path)
             
-            duration = len(audio_data) / self.target_sr
+            duration = len(audio_data) / self.target_sample_rate
             
             return {
                 'file_path': audio_path,
                 'duration_seconds': duration,
-                'sample_rate': self.target_sr,
+                'sample_rate': self.target_sample_rate,
                 'channels': 1,
                 'format': 'float32',
                 'samples': len(audio_data),
@@ -330,6 +378,32 @@ class AudioIngestion:
             chunk = audio_data[i:i + chunk_size]
             yield chunk
     
+    def _probe_duration(self, audio_path: Path) -> Optional[float]:
+        """
+        Get the duration in seconds from file metadata, without decoding samples
+        
+        Uses libsndfile's header parser, then ffprobe for formats it can't read
+        (M4A, AAC, ...). Returns None if neither can tell.
+        """
+        try:
+            return sf.info(str(audio_path)).duration
+        except Exception:
+            pass
+        
+        ffprobe = shutil.which("ffprobe")
+        if ffprobe is None:
+            return None
+        try:
+            process = subprocess.run(
+                [ffprobe, "-v", "error", "-show_entries", "format=duration",
+                 "-of", "default=noprint_wrappers=1:nokey=1", str(audio_path)],
+                capture_output=True, check=True, text=True
+            )
+            return float(process.stdout.strip())
+        except (subprocess.CalledProcessError, ValueError) as e:
+            logger.debug(f"ffprobe could not read duration of {audio_path}: {e}")
+            return None
+    
     def validate_audio_file(self, audio_path: str) -> bool:
         """
         Validate if audio file can be processed
@@ -360,23 +434,17 @@ class AudioIngestion:
                 logger.error(f"Unsupported format: {ext}")
                 return False
             
-            # Try to load a small portion
-            if ext in ['.wav', '.flac']:
-                try:
-                    info = sf.info(str(audio_path))
-                    if info.duration < 1.0:  # Minimum 1 second
-                        logger.error(f"Audio too short: {info.duration}s")
-                        return False
-                except:
-                    return False
-            else:
+            # Read the duration from the container header instead of decoding the file
+            duration = self._probe_duration(audio_path)
+            if duration is None:
+                # No header reader could parse it: decode as a last resort
                 try:
-                    audio_segment = AudioSegment.from_file(str(audio_path))
-                    if len(audio_segment) < 1000:  # Minimum 1 second
-                        logger.error(f"Audio too short: {len(audio_segment)}ms")
-                        return False
+                    duration = len(AudioSegment.from_file(str(audio_path))) / 1000.0
                 except:
                     return False
+            if duration < 1.0:  # Minimum 1 second
+                logger.error(f"Audio too short: {duration}s")
+                return False
             
             logger.info(f"Audio file validation passed: {audio_path}")
             return True
@@ -397,5 +465,37 @@ def process_audio_file(audio_path: str, target_sr: int = 16000) -> Tuple[np.ndar
     Returns:
         Tuple of (normalized_audio, sample_rate)
     """
-    ingestion = AudioIngestion(target_sr)
+    return load_audio_once(audio_path, target_sr)
+
+
+@lru_cache(maxsize=1)
+def _load_normalized_cached(audio_path: str, mtime_ns: int, target_sr: int,
+                            noise_gate_threshold: float) -> Tuple[np.ndarray, int]:
+    """Decode one file; keyed on its modification time so edits are picked up"""
+    ingestion = AudioIngestion(target_sr, noise_gate_threshold)
     return ingestion.load_and_normalize(audio_path)
+
+
+def load_audio_once(audio_path: str, target_sr: int = 16000,
+                    noise_gate_threshold: float = 0.01) -> Tuple[np.ndarray, int]:
+    """
+    Load and normalize an audio file, reusing the last decoded file
+    
+    The standalone transcription, diarization and ingestion helpers all go through
+    here, so running them one after another on the same file decodes it once.
+    
+    Returns:
+        Tuple of (normalized_audio, sample_rate); the array is shared with the cache and
+        read-only, so callers copy it before modifying it in place
+    """
+    audio_path = str(Path(audio_path).resolve())
+    audio_data, sample_rate = _load_normalized_cached(
+        audio_path, os.stat(audio_path).st_mtime_ns, target_sr, noise_gate_threshold
+    )
+    audio_data.setflags(write=False)
+    return audio_data, sample_rate
+
+
+def clear_audio_cache() -> None:
+    """Release the waveform held by load_audio_once"""
+    _load_normalized_cached.cache_clear()
@@ -3,21 +3,47 @@ Speaker diarization module for the podcast analysis pipeline.
 Uses Pyannote-Audio for advanced speaker separation and clustering.
 """
 
+import contextlib
 import numpy as np
 import torch
-import tempfile
 import time
-from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Union
 import warnings
 warnings.filterwarnings("ignore")
 
 from utils.logger import get_logger
 from utils.file_utils import get_file_utils
+from utils.model_cache import get_cached_model
+
+if TYPE_CHECKING:
+    from pyannote.core import Annotation
 
 logger = get_logger(__name__)
 
 
+def candidate_turn_windows(turn_starts: np.ndarray,
+                           turn_ends: np.ndarray,
+                           starts: np.ndarray,
+                           ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Locate the speaker turns that can overlap each interval with binary search
+    
+    Only turns in order[lo[i]:hi[i]] can overlap interval i: hi = turns starting
+    before the interval ends, lo = first turn whose running max end passes the
+    interval start (turns may nest, so plain ends aren't sorted). The window may
+    still hold turns that end before the interval starts; callers filter those.
+    
+    Returns:
+        Tuple of (start-sorted turn order, lo, hi)
+    """
+    order = np.argsort(turn_starts, kind='stable')
+    sorted_starts = turn_starts[order]
+    running_max_ends = np.maximum.accumulate(turn_ends[order])
+    lo = np.searchsorted(running_max_ends, starts, side='right')
+    hi = np.searchsorted(sorted_starts, ends, side='left')
+    return order, lo, hi
+
+
 class SpeakerDiarization:
     """
     Speaker diarization using Pyannote-Audio
@@ -29,7 +55,10 @@ class SpeakerDiarization:
                  device: str = "auto",
                  num_speakers: Optional[int] = None,
                  min_speakers: int = 1,
-                 max_speakers: int = 8):
+                 max_speakers: int = 8,
+                 embedding_batch_size: int = 32,
+                 segmentation_batch_size: int = 32,
+                 half_precision: bool = False):
         """
         Initialize speaker diarization
         
@@ -39,12 +68,18 @@ class SpeakerDiarization:
             num_speakers: Fixed number of speakers (if known)
             min_speakers: Minimum number of speakers
             max_speakers: Maximum number of speakers
+            embedding_batch_size: Speaker embedding batch size for Pyannote
+            segmentation_batch_size: Segmentation window batch size for Pyannote
+            half_precision: Run the Pyannote models under FP16 autocast on CUDA
         """
         self.use_auth_token = use_auth_token
         self.device = self._determine_device(device)
         self.num_speakers = num_speakers
         self.min_speakers = min_speakers
         self.max_speakers = max_speakers
+        self.embedding_batch_size = embedding_batch_size
+        self.segmentation_batch_size = segmentation_batch_size
+        self.half_precision = half_precision and self.device == "cuda"
         self.pipeline = None
         self.file_utils = get_file_utils()
         
@@ -65,36 +100,17 @@ class SpeakerDiarization:
         return device
     
     def _load_pipeline(self):
-        """Load the Pyannote diarization pipeline"""
+        """Load the Pyannote diarization pipeline (reused across instances)"""
         if self.pipeline is not None:
             return
         
         start_time = time.time()
         
         try:
-            from pyannote.audio import Pipeline
-            
-            # Load the pretrained pipeline
-            if self.use_auth_token:
-                self.pipeline = Pipeline.from_pretrained(
-                    "pyannote/speaker-diarization-3.1",
-                    use_auth_token=self.use_auth_token
-                )
-            else:
-                try:
-                    self.pipeline = Pipeline.from_pretrained(
-                        "pyannote/speaker-diarization-3.1"
-                    )
-                except Exception:
-                    # Fallback to older version or local model
-                    logger.warning("Could not load latest model, trying fallback...")
-                    self.pipeline = Pipeline.from_pretrained(
-                        "pyannote/speaker-diarization"
-                    )
-            
-            # Move to device
-            if self.device == "cuda" and torch.cuda.is_available():
-                self.pipeline = self.pipeline.to(torch.device("cuda"))
+            self.pipeline = get_cached_model(
+                ("pyannote", "speaker-diarization", self.device),
+                self._create_pipeline
+            )
             
             load_time = time.time() - start_time
             logger.info(f"Loaded diarization pipeline in {load_time:.2f}s on {self.device}")
@@ -104,6 +120,45 @@ class SpeakerDiarization:
             logger.info("Falling back to simple speaker detection...")
             self.pipeline = "fallback"
     
+    def _create_pipeline(self):
+        """Instantiate the pretrained Pyannote pipeline on the target device"""
+        from pyannote.audio import Pipeline
+        
+        # Load the pretrained pipeline
+        if self.use_auth_token:
+            pipeline = Pipeline.from_pretrained(
+                "pyannote/speaker-diarization-3.1",
+                use_auth_token=self.use_auth_token
+            )
+        else:
+            try:
+                pipeline = Pipeline.from_pretrained(
+                    "pyannote/speaker-diarization-3.1"
+                )
+            except Exception:
+                # Fallback to older version or local model
+                logger.warning("Could not load latest model, trying fallback...")
+                pipeline = Pipeline.from_pretrained(
+                    "pyannote/speaker-diarization"
+                )
+        
+        # Move to device
+        if self.device == "cuda" and torch.cuda.is_available():
+            pipeline = pipeline.to(torch.device("cuda"))
+        
+        # Pipeline.from_pretrained loads on CPU; make a failed move visible instead of silently slow
+        placed_device = getattr(pipeline, 'device', None)
+        if self.device == "cuda" and getattr(placed_device, 'type', None) != "cuda":
+            logger.warning(f"Diarization pipeline is running on {placed_device or 'cpu'}, not CUDA")
+        
+        # Larger embedding batches keep the GPU busy instead of one window at a time
+        if hasattr(pipeline, 'embedding_batch_size'):
+            pipeline.embedding_batch_size = self.embedding_batch_size
+        if hasattr(pipeline, 'segmentation_batch_size'):
+            pipeline.segmentation_batch_size = self.segmentation_batch_size
+        
+        return pipeline
+    
     def diarize_audio(self, 
                      audio_data: np.ndarray, 
                      sample_rate: int = 16000) -> List[Dict]:
@@ -146,44 +201,43 @@ class SpeakerDiarization:
         except Exception as e:
             logger.error(f"Diarization failed: {e}")
             # Return fallback result
-            return self._fallback_diarization(audio_data, sample_rate)
+            return self._post_process_segments(self._fallback_diarization(audio_data, sample_rate))
     
     def _pyannote_diarization(self, audio_data: np.ndarray, sample_rate: int) -> List[Dict]:
         """Perform diarization using Pyannote"""
-        # Save audio to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        try:
-            # Save audio
-            import soundfile as sf
-            sf.write(temp_path, audio_data, sample_rate)
-            
-            # Set diarization parameters
+        # Pass the waveform in memory instead of round-tripping through a temp WAV
+        waveform = torch.from_numpy(np.ascontiguousarray(audio_data, dtype=np.float32))
+        if waveform.ndim == 1:
+            waveform = waveform.unsqueeze(0)  # (channel, time)
+        audio_input = {'waveform': waveform, 'sample_rate': sample_rate}
+        
+        # FP16 autocast halves the bytes moved by the segmentation and embedding models
+        precision = (torch.autocast(device_type="cuda", dtype=torch.float16)
+                     if self.half_precision else contextlib.nullcontext())
+        
+        # Set diarization parameters
+        with precision:
             if self.num_speakers:
-                diarization = self.pipeline(temp_path, num_speakers=self.num_speakers)
+                diarization = self.pipeline(audio_input, num_speakers=self.num_speakers)
             else:
                 diarization = self.pipeline(
-                    temp_path,
+                    audio_input,
                     min_speakers=self.min_speakers,
                     max_speakers=self.max_speakers
                 )
-            
-            # Convert to segments
-            segments = []
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                segments.append({
-                    'start': turn.start,
-                    'end': turn.end,
-                    'speaker': speaker,
-                    'confidence': 1.0  # Pyannote doesn't provide confidence scores directly
-                })
-            
-            return segments
-            
-        finally:
-            # Clean up temporary file
-            Path(temp_path).unlink(missing_ok=True)
+        
+        # Convert to segments
+        segments = []
+        for turn, _, speaker in diarization.itertracks(yield_label=True):
+            segments.append({
+                'start': turn.start,
+                'end': turn.end,
+                'speaker': speaker,
+                'confidence': 1.0,  # Pyannote doesn't provide confidence scores directly
+                'method': 'pyannote'
+            })
+        
+        return segments
     
     def _fallback_diarization(self, audio_data: np.ndarray, sample_rate: int) -> List[Dict]:
         """
@@ -222,43 +276,54 @@ class SpeakerDiarization:
                 'start': 0.0,
                 'end': duration,
                 'speaker': 'Speaker 1',
-                'confidence': 0.5
+                'confidence': 0.5,
+                'method': 'fallback'
             })
         else:
             segments[-1]['end'] = duration
         
         return segments
     
-    def _post_process_segments(self, segments: List[Dict]) -> List[Dict]:
-        """Post-process diarization segments"""
-        if not segments:
-            return []
+    def _post_process_segments(self, segments: List[Dict], gap_threshold: float = 0.5) -> List[Dict]:
+        """
+        Post-process diarization segments
         
+        Drops turns shorter than 0.5 seconds and merges consecutive turns of the
+        same speaker in a single pass (same result as _merge_consecutive_speakers
+        on the filtered list), numbering segments as they are emitted.
+        """
         processed_segments = []
         
-        for i, segment in enumerate(segments):
+        for segment in segments:
             # Skip very short segments (< 0.5 seconds)
             duration = segment['end'] - segment['start']
             if duration < 0.5:
                 continue
             
-            processed_segment = {
-                'segment_id': i + 1,
-                'start_time': round(segment['start'], 2),
-                'end_time': round(segment['end'], 2),
+            start_time = round(segment['start'], 2)
+            end_time = round(segment['end'], 2)
+            confidence = segment.get('confidence', 1.0)
+            
+            # Merge into the previous segment if same speaker and small gap
+            if processed_segments:
+                current_segment = processed_segments[-1]
+                if (current_segment['speaker'] == segment['speaker'] and
+                        start_time - current_segment['end_time'] <= gap_threshold):
+                    current_segment['end_time'] = end_time
+                    current_segment['duration'] = end_time - current_segment['start_time']
+                    current_segment['confidence'] = min(current_segment['confidence'], confidence)
+                    continue
+            
+            processed_segments.append({
+                'segment_id': len(processed_segments) + 1,
+                'start_time': start_time,
+                'end_time': end_time,
                 'duration': round(duration, 2),
                 'speaker': segment['speaker'],
-                'confidence': segment.get('confidence', 1.0)
-            }
-            
-            processed_segments.append(processed_segment)
-        
-        # Merge consecutive segments from the same speaker
-        processed_segments = self._merge_consecutive_speakers(processed_segments)
-        
-        # Re-number segments
-        for i, segment in enumerate(processed_segments):
-            segment['segment_id'] = i + 1
+                'confidence': confidence,
+                # Saved with the step result, so resumed runs know fallback turns aren't speech regions
+                'method': segment['method']
+            })
         
         return processed_segments
     
@@ -293,13 +358,13 @@ class SpeakerDiarization:
         return merged_segments
     
     def align_with_transcript(self, 
-                             diarization_segments: List[Dict], 
+                             diarization_segments: Union[List[Dict], "Annotation"], 
                              transcript_segments: List[Dict]) -> List[Dict]:
         """
         Align diarization with transcript segments
         
         Args:
-            diarization_segments: Speaker diarization segments
+            diarization_segments: Speaker diarization segments, or a pyannote Annotation
             transcript_segments: Transcript segments
             
         Returns:
@@ -307,36 +372,83 @@ class SpeakerDiarization:
         """
         logger.info("Aligning diarization with transcript")
         
-        aligned_segments = []
+        # Read turns straight off a pyannote Annotation instead of rebuilding one
+        if hasattr(diarization_segments, 'itertracks'):
+            diarization_segments = [
+                {'start_time': turn.start, 'end_time': turn.end, 'speaker': speaker}
+                for turn, _, speaker in diarization_segments.itertracks(yield_label=True)
+            ]
+        
+        if not transcript_segments:
+            return []
         
-        for transcript_seg in transcript_segments:
-            # Find the best matching speaker segment
-            best_speaker = "Unknown"
-            best_overlap = 0.0
-            best_confidence = 0.0
+        t_starts = np.array([seg['start_time'] for seg in transcript_segments], dtype=np.float64)
+        t_ends = np.array([seg['end_time'] for seg in transcript_segments], dtype=np.float64)
+        n_segments = len(transcript_segments)
+        
+        best_speakers = np.full(n_segments, "Unknown", dtype=object)
+        best_confidences = np.zeros(n_segments)
+        best_overlaps = np.zeros(n_segments)
+        
+        if diarization_segments:
+            d_starts = np.array([seg['start_time'] for seg in diarization_segments], dtype=np.float64)
+            d_ends = np.array([seg['end_time'] for seg in diarization_segments], dtype=np.float64)
+            d_confidences = np.array([seg.get('confidence', 1.0) for seg in diarization_segments], dtype=np.float64)
+            speakers, speaker_idx = np.unique(
+                [seg['speaker'] for seg in diarization_segments], return_inverse=True
+            )
             
-            for diar_seg in diarization_segments:
-                # Calculate overlap
-                overlap_start = max(transcript_seg['start_time'], diar_seg['start_time'])
-                overlap_end = min(transcript_seg['end_time'], diar_seg['end_time'])
-                overlap = max(0, overlap_end - overlap_start)
-                
-                # Calculate overlap ratio
-                transcript_duration = transcript_seg['end_time'] - transcript_seg['start_time']
-                overlap_ratio = overlap / transcript_duration if transcript_duration > 0 else 0
-                
-                if overlap_ratio > best_overlap:
-                    best_overlap = overlap_ratio
-                    best_speaker = diar_seg['speaker']
-                    best_confidence = diar_seg['confidence']
+            n_speakers = len(speakers)
+            
+            order, lo, hi = candidate_turn_windows(d_starts, d_ends, t_starts, t_ends)
+            window_sizes = np.maximum(hi - lo, 0)
+            
+            # Flatten the candidate (segment, turn) pairs, O(N log M + K) instead of O(N * M)
+            pair_segment = np.repeat(np.arange(n_segments), window_sizes)
+            window_offsets = np.cumsum(window_sizes) - window_sizes
+            pair_position = np.arange(len(pair_segment)) - np.repeat(window_offsets, window_sizes)
+            pair_turn = order[np.repeat(lo, window_sizes) + pair_position]
+            pair_speaker = speaker_idx[pair_turn]
+            pair_overlap = np.clip(
+                np.minimum(t_ends[pair_segment], d_ends[pair_turn])
+                - np.maximum(t_starts[pair_segment], d_starts[pair_turn]),
+                0.0, None
+            )
+            
+            # Total overlap per speaker, shape (N, S); picks the speaker who talks longest in the segment
+            speaker_overlap = np.bincount(
+                pair_segment * n_speakers + pair_speaker,
+                weights=pair_overlap,
+                minlength=n_segments * n_speakers
+            ).reshape(n_segments, n_speakers)
+            best = np.argmax(speaker_overlap, axis=1)
+            rows = np.arange(n_segments)
+            best_overlap = speaker_overlap[rows, best]
+            
+            # Confidence comes from the best speaker's longest overlapping turn
+            # (first such turn on ties): sort pairs by segment, then overlap desc, then turn
+            best_turn = np.zeros(n_segments, dtype=np.intp)
+            if len(pair_segment):
+                pair_score = np.where(pair_speaker == best[pair_segment], pair_overlap, -1.0)
+                ranked = np.lexsort((pair_turn, -pair_score, pair_segment))
+                has_pairs = window_sizes > 0
+                best_turn[has_pairs] = pair_turn[ranked[window_offsets[has_pairs]]]
             
-            # Add speaker information to transcript segment
-            aligned_segment = transcript_seg.copy()
-            aligned_segment['speaker'] = best_speaker
-            aligned_segment['speaker_confidence'] = best_confidence
-            aligned_segment['overlap_ratio'] = best_overlap
+            durations = t_ends - t_starts
+            ratios = np.divide(best_overlap, durations, out=np.zeros(n_segments), where=durations > 0)
+            matched = ratios > 0
             
-            aligned_segments.append(aligned_segment)
+            best_speakers[matched] = speakers[best[matched]]
+            best_confidences[matched] = d_confidences[best_turn[matched]]
+            best_overlaps[matched] = np.minimum(ratios[matched], 1.0)
+        
+        # Add speaker information to each transcript segment
+        aligned_segments = [
+            {**transcript_seg, 'speaker': str(speaker), 'speaker_confidence': confidence, 'overlap_ratio': overlap}
+            for transcript_seg, speaker, confidence, overlap in zip(
+                transcript_segments, best_speakers, best_confidences.tolist(), best_overlaps.tolist()
+            )
+        ]
         
         logger.info(f"Aligned {len(aligned_segments)} transcript segments with speakers")
         return aligned_segments
@@ -444,11 +556,10 @@ def diarize_audio_file(audio_path: str,
         use_auth_token=use_auth_token
     )
     
-    from pipeline.audio_ingestion import AudioIngestion
+    from pipeline.audio_ingestion import load_audio_once
     
-    # Load and normalize audio
-    ingestion = AudioIngestion()
-    audio_data, sample_rate = ingestion.load_and_normalize(audio_path)
+    # Load and normalize audio (reused if another helper already decoded this file)
+    audio_data, sample_rate = load_audio_once(audio_path)
     
     # Diarize
     return diarizer.diarize_audio(audio_data, sample_rate)
@@ -6,18 +6,28 @@ Orchestrates all pipeline modules and manages session-based processing.
 import os
 import time
 import json
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import uuid
 
+import numpy as np
+
+# Rust multipart downloads for the HF Hub when hf_transfer is installed
+# (read by huggingface_hub at import time, so set before any model module loads it)
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
 from utils.logger import get_logger, setup_session_logging
 from utils.file_utils import get_file_utils
 
-from pipeline.audio_ingestion import AudioIngestion
+from pipeline.audio_ingestion import AudioIngestion, clear_audio_cache
 from pipeline.transcription import Transcription
-from pipeline.diarization import SpeakerDiarization
-from pipeline.emotion_detection import EmotionDetection
+from pipeline.diarization import SpeakerDiarization, candidate_turn_windows
+from pipeline.emotion_detection import EmotionDetection, configure_torch_compile
 from pipeline.semantic_segmentation import SemanticSegmentation
 from pipeline.summarization import PodcastSummarizer
 
@@ -55,12 +65,19 @@ class PipelineRunner:
         # Initialize file utilities
         self.file_utils = get_file_utils()
         
+        # Guards session state when steps run concurrently
+        self._state_lock = threading.RLock()
+        
         # Load or create configuration
         self.config = self._load_or_create_config(config)
         
         # Initialize pipeline components
         self._initialize_components()
         
+        # torch.compile options are process-wide: set them once, before any model loads
+        if self.emotion_detector.compile_models:
+            configure_torch_compile(self.emotion_detector.device)
+        
         # Track processing state
         self.state = self._load_session_state()
         
@@ -84,33 +101,61 @@ class PipelineRunner:
                 'noise_gate_threshold': 0.01
             },
             'transcription': {
-                'model_size': 'medium',
+                # Large-v3 encoder with a 4-layer decoder: faster to decode than medium, close to large-v3 accuracy
+                'model_size': 'large-v3-turbo',
                 'backend': 'faster-whisper',
                 'device': 'auto',
-                'compute_type': 'float16'
+                'compute_type': 'auto',
+                'batch_size': 8,
+                # CTranslate2 threads on CPU. 0 uses all cores, or half of them while
+                # diarization runs alongside on CPU (both would otherwise oversubscribe)
+                'cpu_threads': 0,
+                'use_diarization_clips': False
             },
             'diarization': {
                 'device': 'auto',
                 'num_speakers': None,
                 'min_speakers': 1,
-                'max_speakers': 8
+                'max_speakers': 8,
+                'embedding_batch_size': 32,
+                'segmentation_batch_size': 32,
+                'half_precision': False
             },
             'emotion_detection': {
                 'text_model': 'j-hartmann/emotion-english-distilroberta-base',
                 'audio_model': 'audeering/wav2vec2-large-robust-12-ft-emotion-msp-dim',
-                'device': 'auto'
+                'device': 'auto',
+                'text_batch_size': 32,
+                'audio_batch_size': 32,
+                'audio_batch_seconds': 64.0,
+                'quantize_text_model': True,
+                'compile_models': False,
+                'text_max_length': 256,
+                'parallel_modes': True
             },
             'semantic_segmentation': {
                 'embedding_model': 'all-MiniLM-L6-v2',
                 'min_block_size': 3,
                 'similarity_threshold': 0.3,
-                'device': 'auto'
+                'device': 'auto',
+                'batch_size': 64,
+                'quantize_embedding_model': True,
+                # MMR keyphrases over embeddings instead of TF-IDF keywords for key_topics
+                'embedding_key_topics': False
             },
             'summarization': {
                 'model_name': 'mistral:7b',
                 'ollama_url': 'http://localhost:11434',
                 'max_tokens': 300,
                 'temperature': 0.3
+            },
+            'runtime': {
+                # Load/download all models concurrently before the first step
+                'preload_models': True,
+                # Run transcription and diarization side by side (serial on OOM)
+                'parallel_transcription_diarization': True,
+                # Free GPU memory required before running both models on CUDA at once
+                'min_free_gpu_memory_gb': 6.0
             }
         }
 
@@ -155,7 +200,9 @@ class PipelineRunner:
             model_size=self.config['transcription']['model_size'],
             backend=self.config['transcription']['backend'],
             device=self.config['transcription']['device'],
-            compute_type=self.config['transcription']['compute_type']
+            compute_type=self.config['transcription']['compute_type'],
+            batch_size=self.config['transcription']['batch_size'],
+            cpu_threads=self._transcription_cpu_threads()
         )
         
         # Speaker diarization
@@ -163,14 +210,24 @@ class PipelineRunner:
             device=self.config['diarization']['device'],
             num_speakers=self.config['diarization']['num_speakers'],
             min_speakers=self.config['diarization']['min_speakers'],
-            max_speakers=self.config['diarization']['max_speakers']
+            max_speakers=self.config['diarization']['max_speakers'],
+            embedding_batch_size=self.config['diarization']['embedding_batch_size'],
+            segmentation_batch_size=self.config['diarization']['segmentation_batch_size'],
+            half_precision=self.config['diarization']['half_precision']
         )
         
         # Emotion detection
         self.emotion_detector = EmotionDetection(
             text_model=self.config['emotion_detection']['text_model'],
             audio_model=self.config['emotion_detection']['audio_model'],
-            device=self.config['emotion_detection']['device']
+            device=self.config['emotion_detection']['device'],
+            text_batch_size=self.config['emotion_detection']['text_batch_size'],
+            audio_batch_size=self.config['emotion_detection']['audio_batch_size'],
+            audio_batch_seconds=self.config['emotion_detection']['audio_batch_seconds'],
+            quantize_text_model=self.config['emotion_detection']['quantize_text_model'],
+            compile_models=self.config['emotion_detection']['compile_models'],
+            text_max_length=self.config['emotion_detection']['text_max_length'],
+            parallel_modes=self.config['emotion_detection']['parallel_modes']
         )
         
         # Semantic segmentation
@@ -178,7 +235,10 @@ class PipelineRunner:
             embedding_model=self.config['semantic_segmentation']['embedding_model'],
             min_block_size=self.config['semantic_segmentation']['min_block_size'],
             similarity_threshold=self.config['semantic_segmentation']['similarity_threshold'],
-            device=self.config['semantic_segmentation']['device']
+            device=self.config['semantic_segmentation']['device'],
+            batch_size=self.config['semantic_segmentation']['batch_size'],
+            quantize_embedding_model=self.config['semantic_segmentation']['quantize_embedding_model'],
+            embedding_key_topics=self.config['semantic_segmentation']['embedding_key_topics']
         )
         
         # Summarization
@@ -194,6 +254,43 @@ class PipelineRunner:
         
         logger.info("All pipeline components initialized")
     
+    def preload_models(self, resume: bool = True):
+        """
+        Load the models of all pending steps concurrently
+        
+        Model loads are mostly Hub downloads and weight copies, so running them
+        side by side makes a cold start cost about the slowest load instead of
+        the sum. Loaded models land in the process-wide cache, so the steps
+        reuse them. Steps already completed in this session are skipped when
+        resuming.
+        """
+        loaders = {
+            'transcription': [self.transcriber._load_model],
+            'diarization': [self.diarizer._load_pipeline],
+            'emotion_detection': [self.emotion_detector._load_text_model,
+                                  self.emotion_detector._load_audio_model],
+            'semantic_segmentation': [self.semantic_segmenter._load_embedding_model]
+        }
+        completed = set(self.state.get('steps_completed', [])) if resume else set()
+        pending = [loader for step, step_loaders in loaders.items()
+                   if step not in completed for loader in step_loaders]
+        if not pending:
+            return
+        
+        logger.info(f"Preloading {len(pending)} models concurrently")
+        start_time = time.time()
+        
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="model-preload") as executor:
+            futures = [executor.submit(loader) for loader in pending]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    # The step retries the load and handles the failure itself
+                    logger.warning(f"Model preload failed: {e}")
+        
+        logger.info(f"Preloaded models in {time.time() - start_time:.2f}s")
+    
     def _load_session_state(self) -> Dict:
         """Load session processing state"""
         state_path = self.session_dir / "state.json"
@@ -217,8 +314,9 @@ class PipelineRunner:
     def _save_session_state(self):
         """Save current session state"""
         state_path = self.session_dir / "state.json"
-        self.state['last_updated'] = datetime.now().isoformat()
-        self.file_utils.save_json(self.state, str(state_path))
+        with self._state_lock:
+            self.state['last_updated'] = datetime.now().isoformat()
+            self.file_utils.save_json(self.state, str(state_path))
     
     def process_audio_file(self, audio_file_path: str, resume: bool = True) -> Dict:
         """
@@ -241,6 +339,9 @@ class PipelineRunner:
         self.state['audio_file'] = audio_file_path
         self._save_session_state()
         
+        if self.config.get('runtime', {}).get('preload_models', True):
+            self.preload_models(resume=resume)
+        
         results = {}
         
         try:
@@ -251,23 +352,10 @@ class PipelineRunner:
                 resume=resume
             )
             
-            # Step 2: Transcription
-            results['transcription'] = self._run_step(
-                'transcription',
-                lambda: self.transcriber.transcribe_audio(
-                    results['audio_data']['audio'],
-                    results['audio_data']['sample_rate']
-                ),
-                resume=resume
-            )
-            
-            # Step 3: Speaker Diarization
-            results['diarization'] = self._run_step(
-                'diarization',
-                lambda: self.diarizer.diarize_audio(
-                    results['audio_data']['audio'],
-                    results['audio_data']['sample_rate']
-                ),
+            # Steps 2 & 3: Transcription and Speaker Diarization (independent, may overlap)
+            results['transcription'], results['diarization'] = self._run_transcription_and_diarization(
+                results['audio_data']['audio'],
+                results['audio_data']['sample_rate'],
                 resume=resume
             )
             
@@ -302,11 +390,17 @@ class PipelineRunner:
             )
             
             # Step 6: Semantic Segmentation
+            def semantic_segmentation():
+                blocks = self.semantic_segmenter.segment_transcript(results['emotion_analysis'])
+                # Segment embeddings go to a binary sidecar rather than into the JSON cache
+                self.semantic_segmenter.save_segment_embeddings(
+                    str(self.session_dir / "segment_embeddings.npy")
+                )
+                return blocks
+
             results['semantic_blocks'] = self._run_step(
                 'semantic_segmentation',
-                lambda: self.semantic_segmenter.segment_transcript(
-                    results['emotion_analysis']
-                ),
+                semantic_segmentation,
                 resume=resume
             )
             
@@ -354,6 +448,10 @@ class PipelineRunner:
             self.state['failed_at'] = datetime.now().isoformat()
             self._save_session_state()
             raise
+        
+        finally:
+            # Don't keep a decoded waveform alive for the rest of the process
+            clear_audio_cache()
     
     def _run_step(self, step_name: str, step_function, resume: bool = True) -> Dict:
         """
@@ -380,6 +478,10 @@ class PipelineRunner:
                     # For transcript, check 'segments' key
                     if 'segments' in cached_result and (not cached_result['segments']):
                         is_empty = True
+                if not is_empty:
+                    cached_result = self._load_step_arrays(cached_result)
+                    # A missing .npy sidecar makes the cached result incomplete
+                    is_empty = cached_result is None
                 if not is_empty:
                     logger.info(f"Resuming from cached step: {step_name}")
                     return cached_result
@@ -393,19 +495,21 @@ class PipelineRunner:
             # Execute step
             result = step_function()
             
-            # Save result
+            # Save result (arrays go to binary .npy sidecars, the rest to JSON)
             cache_path = self.session_dir / f"{step_name}.json"
-            self.file_utils.save_json(result, str(cache_path))
+            self._save_step_arrays(step_name, result)
+            self.file_utils.save_json(self._with_array_refs(step_name, result), str(cache_path))
             
             # Update state
             step_time = time.time() - step_start
-            self.state['processing_times'][step_name] = step_time
-            
-            if step_name not in self.state.get('steps_completed', []):
-                self.state.setdefault('steps_completed', []).append(step_name)
-            
-            self.state['last_completed_step'] = step_name
-            self._save_session_state()
+            with self._state_lock:
+                self.state['processing_times'][step_name] = step_time
+                
+                if step_name not in self.state.get('steps_completed', []):
+                    self.state.setdefault('steps_completed', []).append(step_name)
+                
+                self.state['last_completed_step'] = step_name
+                self._save_session_state()
             
             logger.info(f"Step completed: {step_name} | Time: {step_time:.2f}s")
             
@@ -415,6 +519,223 @@ class PipelineRunner:
             logger.error(f"Step failed: {step_name} | Error: {e}")
             raise
     
+    @staticmethod
+    def _array_file_name(step_name: str, key: str) -> str:
+        """File name of the .npy sidecar holding one array of a step result"""
+        return f"{step_name}_{key}.npy"
+    
+    def _save_step_arrays(self, step_name: str, result):
+        """Write the numpy arrays of a dict step result as .npy sidecars"""
+        if not isinstance(result, dict):
+            return
+        for key, value in result.items():
+            if isinstance(value, np.ndarray):
+                self.file_utils.save_array(value, self.session_dir / self._array_file_name(step_name, key))
+    
+    def _with_array_refs(self, step_name: str, result):
+        """Copy of a step result with numpy arrays replaced by references to their sidecars"""
+        if not isinstance(result, dict):
+            return result
+        return {
+            key: {'npy_file': self._array_file_name(step_name, key)} if isinstance(value, np.ndarray) else value
+            for key, value in result.items()
+        }
+    
+    @staticmethod
+    def _with_segment_refs(blocks):
+        """Copy of a block list with each block's segments replaced by a segment_ids list"""
+        if not isinstance(blocks, list):
+            return blocks
+        
+        referenced_blocks = []
+        for block in blocks:
+            segments = block.get('segments') if isinstance(block, dict) else None
+            if not isinstance(segments, list) or not all(isinstance(seg, dict) and 'segment_id' in seg
+                                                         for seg in segments):
+                referenced_blocks.append(block)
+                continue
+            referenced_blocks.append({
+                **{key: value for key, value in block.items() if key != 'segments'},
+                'segment_ids': [seg['segment_id'] for seg in segments]
+            })
+        return referenced_blocks
+    
+    def _load_step_arrays(self, cached_result):
+        """
+        Load the .npy sidecars referenced by a cached step result back into arrays
+        
+        Returns:
+            The step result, or None if a referenced sidecar could not be loaded
+        """
+        if not isinstance(cached_result, dict):
+            return cached_result
+        for key, value in cached_result.items():
+            if isinstance(value, dict) and set(value) == {'npy_file'}:
+                # Copy-on-write memory map: pages are read on demand, and the array stays
+                # writable like a freshly computed one (writes never reach the file)
+                array = self.file_utils.load_array(
+                    self.session_dir / value['npy_file'], mmap_mode='c'
+                )
+                if array is None:
+                    return None
+                cached_result[key] = array
+        return cached_result
+    
+    def _run_transcription_and_diarization(self, audio, sample_rate: int,
+                                           resume: bool = True) -> Tuple[Dict, List[Dict]]:
+        """
+        Run transcription and diarization, concurrently when resources allow
+        
+        Both steps only read the audio and produce disjoint outputs. A step that
+        fails with an out-of-memory error while running concurrently is retried
+        on its own once the other has finished.
+        
+        Returns:
+            Tuple of (transcription result, diarization result)
+        """
+        steps = {
+            'transcription': lambda: self.transcriber.transcribe_audio(audio, sample_rate),
+            'diarization': lambda: self.diarizer.diarize_audio(audio, sample_rate)
+        }
+        
+        if self.config['transcription'].get('use_diarization_clips', False):
+            # Diarize first and decode only the speaker turns, trading the overlap for skipping VAD
+            diarization = self._run_step('diarization', steps['diarization'], resume=resume)
+            speech_segments = diarization.get('segments') if isinstance(diarization, dict) else diarization
+            if speech_segments and any(turn.get('method') == 'fallback' for turn in speech_segments):
+                # Fallback turns are fixed windows over the whole file, not speech regions
+                speech_segments = None
+            transcription = self._run_step(
+                'transcription',
+                lambda: self.transcriber.transcribe_audio(audio, sample_rate, speech_segments=speech_segments),
+                resume=resume
+            )
+            return transcription, diarization
+        
+        if not self._can_run_concurrently():
+            return tuple(self._run_step(name, fn, resume=resume) for name, fn in steps.items())
+        
+        logger.info("Running transcription and diarization concurrently")
+        
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline-step") as executor:
+            futures = {
+                name: executor.submit(self._run_step, name, self._on_own_cuda_stream(fn), resume)
+                for name, fn in steps.items()
+            }
+            results = {}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    if not self._is_out_of_memory(e):
+                        raise
+                    results[name] = None
+                    logger.warning(f"Out of memory running {name} concurrently, retrying serially")
+        
+        # Join point: make sure work queued on the side streams has finished
+        self._synchronize_gpu()
+        
+        for name, fn in steps.items():
+            if results[name] is None:
+                self._release_gpu_memory()
+                results[name] = self._run_step(name, fn, resume=resume)
+        
+        return results['transcription'], results['diarization']
+    
+    def _can_run_concurrently(self) -> bool:
+        """Check config and free GPU memory before overlapping the heavy steps"""
+        runtime_config = self.config.get('runtime', {})
+        if not runtime_config.get('parallel_transcription_diarization', True):
+            return False
+        
+        try:
+            import torch
+            if torch.cuda.is_available():
+                free_bytes, _ = torch.cuda.mem_get_info()
+                free_gb = free_bytes / 1024 ** 3
+                min_free_gb = runtime_config.get('min_free_gpu_memory_gb', 6.0)
+                if free_gb < min_free_gb:
+                    logger.info(f"Only {free_gb:.1f}GB GPU memory free, running steps serially")
+                    return False
+        except Exception:
+            pass
+        
+        return True
+    
+    def _transcription_cpu_threads(self) -> int:
+        """
+        CTranslate2 threads for CPU transcription (0 lets Transcription use all cores)
+        
+        When transcription and diarization overlap on CPU, pyannote already uses
+        every torch intra-op thread, so transcription gets half the cores rather
+        than oversubscribing them.
+        """
+        transcription_config = self.config['transcription']
+        if transcription_config['cpu_threads']:
+            return transcription_config['cpu_threads']
+        if (transcription_config.get('use_diarization_clips', False)
+                or not self.config.get('runtime', {}).get('parallel_transcription_diarization', True)):
+            return 0
+        
+        device = transcription_config['device']
+        if device == "auto":
+            try:
+                import torch
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+            except ImportError:
+                device = "cpu"
+        if device != "cpu":
+            return 0
+        
+        return max(1, (os.cpu_count() or 2) // 2)
+    
+    @staticmethod
+    def _on_own_cuda_stream(step_function):
+        """
+        Wrap a step so its PyTorch kernels go to a dedicated CUDA stream
+        
+        Kernels from two threads on the default stream serialize; separate
+        streams let the GPU interleave them. No-op without CUDA.
+        """
+        def run():
+            try:
+                import torch
+                use_stream = torch.cuda.is_available()
+            except ImportError:
+                use_stream = False
+            if not use_stream:
+                return step_function()
+            with torch.cuda.stream(torch.cuda.Stream()):
+                return step_function()
+        return run
+    
+    @staticmethod
+    def _synchronize_gpu():
+        """Wait for all queued CUDA work on every stream"""
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.synchronize()
+        except Exception:
+            pass
+    
+    @staticmethod
+    def _is_out_of_memory(error: Exception) -> bool:
+        """Check if an exception is a (CUDA) out-of-memory error"""
+        if isinstance(error, MemoryError):
+            return True
+        return "out of memory" in str(error).lower()
+    
+    @staticmethod
+    def _release_gpu_memory():
+        """Return cached CUDA blocks so a retried step has room to run"""
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+    
     def _enrich_segments_with_speakers(self, 
                                      transcription_segments,
                                      diarization_segments) -> List[Dict]:
@@ -429,16 +750,26 @@ class PipelineRunner:
         if isinstance(diarization_segments, dict) and 'segments' in diarization_segments:
             diarization_segments = diarization_segments['segments']
 
+        # Binary-search each segment's window of candidate speaker turns
+        # instead of testing every turn, O(N log M + K) rather than O(N * M)
+        t_starts = np.array([seg['start_time'] for seg in transcription_segments], dtype=np.float64)
+        t_ends = np.array([seg['end_time'] for seg in transcription_segments], dtype=np.float64)
+        d_starts = np.array([seg['start_time'] for seg in diarization_segments], dtype=np.float64)
+        d_ends = np.array([seg['end_time'] for seg in diarization_segments], dtype=np.float64)
+        order, lo, hi = candidate_turn_windows(d_starts, d_ends, t_starts, t_ends)
+
         enriched_segments = []
         seg_id = 1
-        for trans_seg in transcription_segments:
+        for row, trans_seg in enumerate(transcription_segments):
             t_start = trans_seg['start_time']
             t_end = trans_seg['end_time']
             t_text = trans_seg['text']
             t_other = {k: v for k, v in trans_seg.items() if k not in ['segment_id', 'start_time', 'end_time', 'duration', 'text']}
 
             # Find all speaker segments overlapping this transcription segment
-            overlapping = [d for d in diarization_segments if not (d['end_time'] <= t_start or d['start_time'] >= t_end)]
+            candidates = order[lo[row]:hi[row]]
+            candidates = np.sort(candidates[d_ends[candidates] > t_start])
+            overlapping = [diarization_segments[j] for j in candidates]
 
             if not overlapping:
                 # No speaker info, assign Unknown
@@ -697,9 +1028,16 @@ class PipelineRunner:
         """Save all results in various formats, robust to all types"""
         logger.info("Saving all results")
 
-        # Save complete results as JSON
+        # Save complete results as JSON (the waveform stays in its .npy sidecar)
         complete_results_path = self.session_dir / "complete_results.json"
-        self.file_utils.save_json(results, str(complete_results_path))
+        serializable_results = dict(results)
+        if 'audio_data' in results:
+            serializable_results['audio_data'] = self._with_array_refs('audio_ingestion', results['audio_data'])
+        # Blocks refer to their segments by id; the full segments are already under emotion_analysis
+        for key in ('semantic_blocks', 'summaries'):
+            if key in results:
+                serializable_results[key] = self._with_segment_refs(results[key])
+        self.file_utils.save_json(serializable_results, str(complete_results_path))
 
         # Save transcription as SRT
         if 'transcription' in results:
@@ -733,15 +1071,15 @@ class PipelineRunner:
     
     def _save_srt_file(self, segments: List[Dict], srt_path: str):
         """Save transcription as SRT subtitle file"""
+        # Stream one cue string per segment instead of three writes each
+        cues = (
+            f"{i}\n"
+            f"{self._format_srt_time(segment['start_time'])} --> {self._format_srt_time(segment['end_time'])}\n"
+            f"{segment['text'].strip()}\n\n"
+            for i, segment in enumerate(segments, 1)
+        )
         with open(srt_path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(segments, 1):
-                start_time = self._format_srt_time(segment['start_time'])
-                end_time = self._format_srt_time(segment['end_time'])
-                text = segment['text'].strip()
-                
-                f.write(f"{i}\n")
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{text}\n\n")
+            f.writelines(cues)
     
     def _format_srt_time(self, seconds: float) -> str:
         """Format time for SRT format"""
@@ -1155,6 +1493,8 @@ if __name__ == "__main__":
     parser.add_argument('--session_id', type=str, default=None, help='Session ID to resume or create')
     parser.add_argument('--resume', action='store_true', help='Resume from previous progress if available')
     parser.add_argument('--config', type=str, default=None, help='Path to custom config JSON file')
+    parser.add_argument('--model_size', type=str, default=None,
+                        help='Whisper model (default large-v3-turbo; e.g. large-v3 for the hardest audio)')
     args = parser.parse_args()
 
     # Normalize and resolve all paths
@@ -1182,6 +1522,11 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"Failed to load config: {e}")
 
+    # Command-line model choice overrides the config file
+    if args.model_size:
+        config = config or {}
+        config.setdefault('transcription', {})['model_size'] = args.model_size
+
     print(f"\n🎙️ Podcast Analysis Pipeline Runner")
     print(f"Audio file: {audio_path}")
     print(f"Session ID: {args.session_id or '[auto]'}")
@@ -8,12 +8,21 @@ import time
 from typing import List, Dict, Optional, Tuple
 from collections import defaultdict
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 from utils.logger import get_logger
 from utils.file_utils import get_file_utils
+from utils.model_cache import get_cached_model
 
 logger = get_logger(__name__)
 
+# Frequent words that make poor topic labels in the frequency-based fallbacks
+COMMON_TOPIC_WORDS = frozenset({
+    'that', 'this', 'with', 'from', 'they', 'were', 'been', 'have',
+    'said', 'what', 'when', 'where', 'while', 'which', 'these',
+    'those', 'then', 'than', 'them', 'here', 'there', 'very'
+})
+
 
 class SemanticSegmentation:
     """
@@ -25,7 +34,10 @@ class SemanticSegmentation:
                  embedding_model: str = "all-MiniLM-L6-v2",
                  min_block_size: int = 3,
                  similarity_threshold: float = 0.3,
-                 device: str = "auto"):
+                 device: str = "auto",
+                 batch_size: int = 64,
+                 quantize_embedding_model: bool = True,
+                 embedding_key_topics: bool = False):
         """
         Initialize semantic segmentation
         
@@ -34,16 +46,25 @@ class SemanticSegmentation:
             min_block_size: Minimum number of segments per block
             similarity_threshold: Similarity threshold for clustering
             device: Device to use
+            batch_size: Number of texts per embedding batch
+            quantize_embedding_model: Use dynamic INT8 quantization for the embedding model on CPU
+            embedding_key_topics: Pick key topics by MMR over phrase embeddings instead of TF-IDF
         """
         self.embedding_model_name = embedding_model
         self.min_block_size = min_block_size
         self.similarity_threshold = similarity_threshold
         self.device = self._determine_device(device)
+        self.batch_size = batch_size
+        self.quantize_embedding_model = quantize_embedding_model and self.device == "cpu"
+        self.embedding_key_topics = embedding_key_topics
         
         # Models (loaded lazily)
         self.embedding_model = None
         self.topic_model = None
         
+        # Segment embeddings from the last run, reused for key topic extraction
+        self._segment_embeddings = None
+        
         self.file_utils = get_file_utils()
         
         logger.info(f"Initializing semantic segmentation | "
@@ -71,11 +92,10 @@ class SemanticSegmentation:
         start_time = time.time()
         
         try:
-            from sentence_transformers import SentenceTransformer
-            
-            self.embedding_model = SentenceTransformer(
-                self.embedding_model_name,
-                device=self.device
+            self.embedding_model = get_cached_model(
+                ("sentence-transformer", self.embedding_model_name, self.device,
+                 self.quantize_embedding_model),
+                self._create_embedding_model
             )
             
             load_time = time.time() - start_time
@@ -86,6 +106,29 @@ class SemanticSegmentation:
             logger.info("Falling back to simple text similarity")
             self.embedding_model = "fallback"
     
+    def _create_embedding_model(self):
+        """Instantiate the sentence embedding model on the target device"""
+        from sentence_transformers import SentenceTransformer
+        
+        model = SentenceTransformer(self.embedding_model_name, device=self.device)
+        
+        # Half precision halves activation memory and uses tensor cores on GPU
+        if self.device == "cuda":
+            model = model.half()
+        
+        # On CPU, INT8 weights for the Linear layers that dominate MiniLM's compute
+        if self.quantize_embedding_model:
+            try:
+                import torch
+                model = torch.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                logger.info("Applied dynamic INT8 quantization to embedding model")
+            except Exception as e:
+                logger.warning(f"Embedding model quantization failed, using FP32: {e}")
+        
+        return model
+    
     def _load_topic_model(self):
         """Load topic modeling components"""
         if self.topic_model is not None:
@@ -127,6 +170,8 @@ class SemanticSegmentation:
             List of semantic blocks with grouped segments
         """
         logger.info(f"Starting semantic segmentation for {len(segments)} segments")
+        # Drop the previous transcript's embeddings so they are never saved for this one
+        self._segment_embeddings = None
         
         if len(segments) < self.min_block_size:
             # Not enough segments for meaningful segmentation
@@ -137,14 +182,19 @@ class SemanticSegmentation:
         # Extract text for analysis
         texts = [seg.get('text', '') for seg in segments]
         
-        # Method 1: Embedding-based segmentation
-        embedding_blocks = self._segment_by_embeddings(segments, texts)
-        
-        # Method 2: Topic-based segmentation
-        topic_blocks = self._segment_by_topics(segments, texts)
-        
-        # Method 3: Sliding window approach
-        window_blocks = self._segment_by_sliding_window(segments, texts)
+        # Topic modeling is CPU-only (TF-IDF + LDA), so run it in a worker thread
+        # while the embedding model encodes on the main thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Method 2: Topic-based segmentation
+            topic_future = executor.submit(self._segment_by_topics, segments, texts)
+            
+            # Method 1: Embedding-based segmentation
+            embedding_blocks = self._segment_by_embeddings(segments, texts)
+            
+            # Method 3: Sliding window approach
+            window_blocks = self._segment_by_sliding_window(segments, texts)
+            
+            topic_blocks = topic_future.result()
         
         # Combine and refine segmentation results
         final_blocks = self._combine_segmentation_methods(
@@ -169,8 +219,19 @@ class SemanticSegmentation:
             return self._fallback_embedding_segmentation(segments, texts)
         
         try:
-            # Generate embeddings
-            embeddings = self.embedding_model.encode(texts)
+            # Generate embeddings (encode sorts by length internally, so batches pad minimally).
+            # Unit-normalized so the dot product below is cosine similarity
+            # Repeated texts are encoded once and scattered back to their segments
+            unique_texts, inverse = np.unique(np.array(texts, dtype=object), return_inverse=True)
+            unique_embeddings = self.embedding_model.encode(
+                unique_texts.tolist(),
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            ).astype(np.float32, copy=False)
+            embeddings = unique_embeddings[inverse]
+            self._segment_embeddings = embeddings
             
             # Calculate similarity matrix
             similarity_matrix = np.dot(embeddings, embeddings.T)
@@ -366,6 +427,7 @@ class SemanticSegmentation:
     def _post_process_blocks(self, blocks: List[List[int]], segments: List[Dict]) -> List[Dict]:
         """Post-process segmentation blocks"""
         processed_blocks = []
+        block_segment_indices = []
         
         for block_id, segment_indices in enumerate(blocks):
             if not segment_indices:
@@ -382,9 +444,6 @@ class SemanticSegmentation:
             end_time = max(seg['end_time'] for seg in block_segments)
             total_text = " ".join(seg['text'] for seg in block_segments)
             
-            # Extract key topics/themes
-            key_topics = self._extract_key_topics(total_text)
-            
             # Create block
             block = {
                 'block_id': block_id + 1,
@@ -393,11 +452,19 @@ class SemanticSegmentation:
                 'duration': end_time - start_time,
                 'segment_count': len(block_segments),
                 'text': total_text,
-                'key_topics': key_topics,
+                'key_topics': [],
                 'segments': block_segments
             }
             
             processed_blocks.append(block)
+            block_segment_indices.append(segment_indices)
+        
+        # Extract key topics/themes for all blocks in one pass
+        key_topics = self._extract_key_topics_batch(
+            [block['text'] for block in processed_blocks], block_segment_indices
+        )
+        for block, topics in zip(processed_blocks, key_topics):
+            block['key_topics'] = topics
         
         return processed_blocks
     
@@ -441,8 +508,145 @@ class SemanticSegmentation:
         
         return ' '.join(cleaned_words)
     
-    def _extract_key_topics(self, text: str) -> List[str]:
+    def _extract_key_topics(self, text: str, segment_indices: Optional[List[int]] = None) -> List[str]:
         """Extract key topics/themes from text"""
+        return self._extract_key_topics_batch([text], [segment_indices])[0]
+    
+    def _extract_key_topics_batch(self,
+                                  texts: List[str],
+                                  segment_index_lists: List[Optional[List[int]]]) -> List[List[str]]:
+        """Extract key topics/themes for several block texts"""
+        key_topics = [[] for _ in texts]
+        
+        # Optionally rank candidate phrases against each block's segment embeddings
+        if (self.embedding_key_topics and self._segment_embeddings is not None
+                and any(i is not None for i in segment_index_lists)):
+            key_topics = self._extract_key_topics_with_embeddings(texts, segment_index_lists)
+        
+        # Blocks still without topics get TF-IDF keywords, scored for all of them at once
+        missing = [b for b, topics in enumerate(key_topics) if not topics]
+        if missing:
+            for b, topics in zip(missing, self._extract_key_topics_by_tfidf([texts[b] for b in missing])):
+                key_topics[b] = topics
+        
+        return key_topics
+    
+    def _extract_key_topics_by_tfidf(self, texts: List[str], top_n: int = 5) -> List[List[str]]:
+        """
+        Keyword fallback scoring every text in one sparse term-count matrix
+        
+        Terms must occur more than once in a text; tf * idf favours words that
+        set a block apart from the others. Falls back to per-text word
+        frequency without scikit-learn.
+        """
+        try:
+            from sklearn.feature_extraction.text import CountVectorizer
+            
+            vectorizer = CountVectorizer(token_pattern=r'\b[a-zA-Z]{4,}\b',
+                                         stop_words=list(COMMON_TOPIC_WORDS))
+            counts = vectorizer.fit_transform(texts).tocsr()
+        except ValueError:
+            # Empty vocabulary: no text has a usable word
+            return [[] for _ in texts]
+        except ImportError:
+            return [self._extract_key_topics_by_frequency(text) for text in texts]
+        
+        vocabulary = vectorizer.get_feature_names_out()
+        document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+        
+        key_topics = []
+        for b in range(len(texts)):
+            columns = counts.indices[counts.indptr[b]:counts.indptr[b + 1]]
+            tf = counts.data[counts.indptr[b]:counts.indptr[b + 1]]
+            repeated = tf > 1
+            columns, scores = columns[repeated], tf[repeated] * idf[columns[repeated]]
+            # Highest score first, alphabetical on ties (vocabulary columns are sorted)
+            ranked = columns[np.lexsort((columns, -scores))][:top_n]
+            key_topics.append([str(vocabulary[c]) for c in ranked])
+        
+        return key_topics
+    
+    def _extract_key_topics_with_embeddings(self,
+                                            texts: List[str],
+                                            segment_index_lists: List[Optional[List[int]]],
+                                            top_n: int = 5,
+                                            diversity: float = 0.5,
+                                            max_candidates: int = 50) -> List[List[str]]:
+        """
+        KeyBERT-style keyphrase extraction reusing the loaded embedding model
+        
+        Candidates for every block come from a single CountVectorizer pass and are
+        encoded together in one batch. Each block embedding is the mean of its
+        already computed segment embeddings, and Maximal Marginal Relevance trades
+        relevance to the block against redundancy between picked phrases.
+        """
+        key_topics = [[] for _ in texts]
+        try:
+            from sklearn.feature_extraction.text import CountVectorizer
+            
+            vectorizer = CountVectorizer(ngram_range=(1, 2), stop_words='english',
+                                         token_pattern=r'\b[a-zA-Z]{3,}\b')
+            counts = vectorizer.fit_transform(texts).tocsr()
+            counts.sort_indices()
+            vocabulary = vectorizer.get_feature_names_out()
+            
+            # Keep each block's most frequent candidates to bound the encoding cost
+            block_candidates = {}
+            for b, segment_indices in enumerate(segment_index_lists):
+                if segment_indices is None:
+                    continue
+                row = counts.getrow(b)
+                columns, values = row.indices, row.data
+                if len(columns) == 0:
+                    continue
+                block_candidates[b] = columns[np.lexsort((columns, -values))][:max_candidates]
+            
+            if not block_candidates:
+                return key_topics
+            
+            # Encode the union of all blocks' candidates once
+            candidate_ids = np.unique(np.concatenate(list(block_candidates.values())))
+            candidate_embeddings = self.embedding_model.encode(
+                [vocabulary[i] for i in candidate_ids],
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            ).astype(np.float32, copy=False)
+            
+            n_embeddings = len(self._segment_embeddings)
+            for b, columns in block_candidates.items():
+                valid_indices = [i for i in segment_index_lists[b] if i < n_embeddings]
+                if not valid_indices:
+                    continue
+                doc_embedding = self._segment_embeddings[valid_indices].mean(axis=0)
+                doc_embedding /= np.linalg.norm(doc_embedding) + 1e-12
+                
+                embeddings = candidate_embeddings[np.searchsorted(candidate_ids, columns)]
+                relevance = embeddings @ doc_embedding
+                similarity = embeddings @ embeddings.T
+                
+                # Maximal Marginal Relevance selection
+                selected = [int(np.argmax(relevance))]
+                redundancy = similarity[selected[0]].copy()
+                while len(selected) < min(top_n, len(columns)):
+                    scores = (1 - diversity) * relevance - diversity * redundancy
+                    scores[selected] = -np.inf
+                    best = int(np.argmax(scores))
+                    selected.append(best)
+                    redundancy = np.maximum(redundancy, similarity[best])
+                
+                key_topics[b] = [str(vocabulary[columns[i]]) for i in selected]
+            
+            return key_topics
+            
+        except Exception as e:
+            logger.debug(f"Embedding keyphrase extraction failed: {e}")
+            return [[] for _ in texts]
+    
+    def _extract_key_topics_by_frequency(self, text: str) -> List[str]:
+        """Extract key topics by word frequency"""
         # Simple keyword extraction
         words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
         
@@ -455,15 +659,9 @@ class SemanticSegmentation:
         top_words = sorted(word_counts.items(), key=lambda x: x[1], reverse=True)[:10]
         
         # Filter out common words
-        common_words = {
-            'that', 'this', 'with', 'from', 'they', 'were', 'been', 'have',
-            'said', 'what', 'when', 'where', 'while', 'which', 'these',
-            'those', 'then', 'than', 'them', 'here', 'there', 'very'
-        }
-        
         key_topics = [
             word for word, count in top_words 
-            if word not in common_words and count > 1
+            if word not in COMMON_TOPIC_WORDS and count > 1
         ][:5]
         
         return key_topics
@@ -489,6 +687,27 @@ class SemanticSegmentation:
         self.file_utils.save_json(semantic_data, output_path)
         logger.info(f"Saved semantic blocks to: {output_path}")
     
+    def save_segment_embeddings(self, output_path: str, dtype=np.float16) -> bool:
+        """
+        Save the segment embeddings of the last run as a binary .npy file
+        
+        The embeddings are unit-normalized, so float16 keeps cosine similarities
+        to about 1e-3 at half the size of float32.
+        
+        Args:
+            output_path: Path to save the embeddings, rows in segment order
+            dtype: Storage dtype of the saved array
+            
+        Returns:
+            True if embeddings were available and saved
+        """
+        if self._segment_embeddings is None:
+            return False
+        
+        self.file_utils.save_array(np.asarray(self._segment_embeddings, dtype=dtype), output_path)
+        logger.info(f"Saved segment embeddings to: {output_path}")
+        return True
+    
     def get_segmentation_stats(self, blocks: List[Dict]) -> Dict:
         """
         Get statistics about segmentation
@@ -516,6 +735,19 @@ class SemanticSegmentation:
         }
 
 
+def load_segment_embeddings(file_path: str) -> Optional[np.ndarray]:
+    """
+    Memory-map segment embeddings saved by save_segment_embeddings
+    
+    Args:
+        file_path: Path to the .npy file
+        
+    Returns:
+        Read-only array of shape (segments, dim), or None if the file doesn't exist
+    """
+    return get_file_utils().load_array(file_path, mmap_mode='r')
+
+
 def segment_transcript_semantically(segments: List[Dict],
                                   min_block_size: int = 3,
                                   similarity_threshold: float = 0.3) -> List[Dict]:
@@ -166,8 +166,8 @@ class PodcastSummarizer:
             insights = self._extract_insights(block, emotion_analysis)
             
             # Enhance block with all analysis
-            enhanced_block = block.copy()
-            enhanced_block.update({
+            enhanced_block = {
+                **block,
                 'summary': summary,
                 'key_points': key_points,
                 'insights': insights,
@@ -180,7 +180,7 @@ class PodcastSummarizer:
                     'dominant_emotion': emotion_analysis.get('dominant_emotion', 'neutral'),
                     'emotion_confidence': emotion_analysis.get('confidence', 0.0)
                 }
-            })
+            }
             
             summarized_blocks.append(enhanced_block)
         
@@ -444,8 +444,8 @@ Emotional tone: [how emotion affects the content]
             insights = self._fallback_insights(block)
             insights['emotional_tone'] = emotion_analysis.get('dominant_emotion', 'neutral')
             
-            enhanced_block = block.copy()
-            enhanced_block.update({
+            enhanced_block = {
+                **block,
                 'summary': summary,
                 'key_points': key_points,
                 'insights': insights,
@@ -458,7 +458,7 @@ Emotional tone: [how emotion affects the content]
                     'dominant_emotion': emotion_analysis.get('dominant_emotion', 'neutral'),
                     'emotion_confidence': emotion_analysis.get('confidence', 0.0)
                 }
-            })
+            }
             
             summarized_blocks.append(enhanced_block)
         
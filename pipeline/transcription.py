@@ -4,18 +4,21 @@ Uses Whisper or Faster-Whisper for high-quality speech-to-text conversion.
 """
 
 import numpy as np
-import tempfile
+import os
 import time
-from pathlib import Path
 from typing import List, Dict, Union, Optional, Tuple
 import warnings
 warnings.filterwarnings("ignore")
 
 from utils.logger import get_logger
 from utils.file_utils import get_file_utils
+from utils.model_cache import get_cached_model
 
 logger = get_logger(__name__)
 
+# Both Whisper backends assume raw arrays are sampled at 16kHz
+WHISPER_SAMPLE_RATE = 16000
+
 
 class Transcription:
     """
@@ -27,21 +30,28 @@ class Transcription:
                  model_size: str = "base",
                  backend: str = "faster-whisper",
                  device: str = "auto",
-                 compute_type: str = "float16"):
+                 compute_type: str = "auto",
+                 batch_size: int = 8,
+                 cpu_threads: int = 0):
         """
         Initialize transcription module
         
         Args:
-            model_size: Whisper model size (tiny, base, small, medium, large)
+            model_size: Whisper model size (tiny, base, small, medium, large-v3, large-v3-turbo)
             backend: "whisper" or "faster-whisper"
             device: Device to use ("cpu", "cuda", "auto")
-            compute_type: Compute type for faster-whisper
+            compute_type: Compute type for faster-whisper ("auto", "float16", "int8", ...)
+            batch_size: Number of VAD chunks decoded per batch with faster-whisper (1 disables batching)
+            cpu_threads: CTranslate2 threads on CPU (0 uses all cores)
         """
         self.model_size = model_size
         self.backend = backend
         self.device = self._determine_device(device)
-        self.compute_type = compute_type
+        self.compute_type = self._determine_compute_type(compute_type)
+        self.batch_size = batch_size
+        self.cpu_threads = cpu_threads or os.cpu_count() or 4
         self.model = None
+        self.batched_model = None
         self.file_utils = get_file_utils()
         
         logger.info(f"Initializing transcription with {backend} | "
@@ -60,43 +70,87 @@ class Transcription:
                 return "cpu"
         return device
     
+    def _determine_compute_type(self, compute_type: str) -> str:
+        """Pick a CTranslate2 compute type suited to the device"""
+        if compute_type == "auto":
+            # INT8 weights with FP16 activations on GPU: half the weight bandwidth of
+            # float16 and INT8 tensor-core GEMMs, at near-identical transcription accuracy
+            return "int8_float16" if self.device == "cuda" else "int8"
+        if self.device == "cpu" and "float16" in compute_type:
+            # CTranslate2 has no FP16 kernels on CPU; INT8 is the fast path there
+            logger.warning(f"compute_type '{compute_type}' is not supported on CPU, using int8")
+            return "int8"
+        return compute_type
+    
     def _load_model(self):
-        """Load the Whisper model"""
+        """Load the Whisper model (reused across instances)"""
         if self.model is not None:
             return
         
+        cache_key = ("whisper", self.backend, self.model_size, self.device, self.compute_type, self.cpu_threads)
         start_time = time.time()
         
         try:
-            if self.backend == "faster-whisper":
-                from faster_whisper import WhisperModel
-                
-                self.model = WhisperModel(
-                    self.model_size,
-                    device=self.device,
-                    compute_type=self.compute_type
-                )
-                
-            else:  # openai-whisper
-                import whisper
-                
-                self.model = whisper.load_model(
-                    self.model_size,
-                    device=self.device
-                )
+            self.model = get_cached_model(cache_key, self._create_model)
             
             load_time = time.time() - start_time
             logger.info(f"Loaded {self.backend} model '{self.model_size}' "
-                       f"in {load_time:.2f}s on {self.device}")
+                       f"in {load_time:.2f}s on {self.device} ({self.compute_type})")
             
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             raise
     
+    def _create_model(self):
+        """Instantiate the Whisper model for the configured backend"""
+        if self.backend == "faster-whisper":
+            from faster_whisper import WhisperModel
+            
+            # CTranslate2 only uses 4 intra-op threads on CPU unless told otherwise
+            return WhisperModel(
+                self.model_size,
+                device=self.device,
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads if self.device == "cpu" else 0
+            )
+        
+        # openai-whisper
+        import whisper
+        
+        model = whisper.load_model(
+            self.model_size,
+            device=self.device
+        )
+        
+        # Store weights in FP16 on GPU; otherwise Whisper's layers cast the FP32
+        # weights to the FP16 activations on every call during fp16 decoding
+        if self.device == "cuda":
+            model = model.half()
+        
+        return model
+    
+    def _get_batched_model(self):
+        """Wrap the faster-whisper model in a batched inference pipeline, if available"""
+        if self.batched_model is None:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+                self.batched_model = BatchedInferencePipeline(model=self.model)
+            except ImportError:
+                logger.warning("BatchedInferencePipeline requires faster-whisper>=1.1, "
+                               "falling back to sequential decoding")
+                self.batched_model = "unavailable"
+        return None if self.batched_model == "unavailable" else self.batched_model
+    
+    def _use_batched_inference(self) -> bool:
+        """Whether transcription runs through the batched faster-whisper pipeline"""
+        return (self.backend == "faster-whisper" and self.batch_size > 1
+                and self._get_batched_model() is not None)
+    
     def transcribe_audio(self, 
                         audio_data: np.ndarray, 
                         sample_rate: int = 16000,
-                        max_chunk_duration: float = 300.0) -> List[Dict]:
+                        max_chunk_duration: float = 300.0,
+                        speech_segments: Optional[List[Dict]] = None) -> List[Dict]:
         """
         Transcribe audio data to text with timestamps
         
@@ -104,6 +158,8 @@ class Transcription:
             audio_data: Audio data as numpy array
             sample_rate: Sample rate of audio
             max_chunk_duration: Maximum duration per chunk in seconds (5 minutes default)
+            speech_segments: Speaker turns (start_time/end_time) to decode instead of
+                running VAD; only used by the batched faster-whisper pipeline
             
         Returns:
             List of transcript segments with start, end, and text
@@ -118,14 +174,15 @@ class Transcription:
         start_time = time.time()
         
         try:
-            # If audio is longer than max_chunk_duration, split into chunks
-            if duration > max_chunk_duration:
+            # If audio is longer than max_chunk_duration, split into chunks.
+            # The batched pipeline already works on bounded VAD chunks, so it takes the whole file.
+            if duration > max_chunk_duration and not self._use_batched_inference():
                 logger.info(f"Audio is {duration:.2f}s, splitting into chunks of {max_chunk_duration}s")
                 segments = self._transcribe_chunked(audio_data, sample_rate, max_chunk_duration)
             else:
                 try:
                     if self.backend == "faster-whisper":
-                        raw_segments = self._transcribe_faster_whisper(audio_data, sample_rate)
+                        raw_segments = self._transcribe_faster_whisper(audio_data, sample_rate, speech_segments)
                     else:
                         raw_segments = self._transcribe_openai_whisper(audio_data, sample_rate)
                     # Post-process raw segments for non-chunked case
@@ -152,6 +209,36 @@ class Transcription:
             logger.error(f"Transcription failed: {e}")
             raise
     
+    @staticmethod
+    def _speech_clip_timestamps(speech_segments: List[Dict], max_clip_duration: float = 30.0) -> List[Dict]:
+        """
+        Pack speaker turns into clips of at most one Whisper window
+        
+        Consecutive turns are merged while the clip spans no more than
+        max_clip_duration, and longer turns are split, so each clip fills a 30s
+        window rather than being padded alone. Bounds are in 16kHz samples, the
+        unit faster-whisper's batched pipeline uses for its own VAD clips.
+        """
+        clips = []
+        for turn in sorted(speech_segments, key=lambda t: t['start_time']):
+            start, end = turn['start_time'], turn['end_time']
+            if clips and end - clips[-1][0] <= max_clip_duration:
+                # Turn fits in the current clip
+                clips[-1][1] = max(clips[-1][1], end)
+                continue
+            if clips:
+                start = max(start, clips[-1][1])
+            while end - start > max_clip_duration:
+                clips.append([start, start + max_clip_duration])
+                start += max_clip_duration
+            if end > start:
+                clips.append([start, end])
+        
+        return [
+            {'start': int(start * WHISPER_SAMPLE_RATE), 'end': int(end * WHISPER_SAMPLE_RATE)}
+            for start, end in clips
+        ]
+    
     def _transcribe_chunked(self, audio_data: np.ndarray, sample_rate: int, chunk_duration: float) -> List[Dict]:
         """Transcribe audio in chunks to manage memory usage"""
         chunk_samples = int(chunk_duration * sample_rate)
@@ -189,24 +276,54 @@ class Transcription:
         # If all chunks fail, return empty list, else return all valid segments
         return all_segments
     
-    def _transcribe_faster_whisper(self, audio_data: np.ndarray, sample_rate: int) -> List[Dict]:
+    def _transcribe_faster_whisper(self, audio_data: np.ndarray, sample_rate: int,
+                                   speech_segments: Optional[List[Dict]] = None) -> List[Dict]:
         """Transcribe using faster-whisper"""
         segments = []
         
-        # faster-whisper expects audio as float32
-        audio_float32 = audio_data.astype(np.float32)
+        # faster-whisper expects 16kHz float32 audio
+        audio_float32 = self._prepare_audio(audio_data, sample_rate)
         
-        # Transcribe with word-level timestamps
-        segments_generator, info = self.model.transcribe(
-            audio_float32,
+        clip_timestamps = self._speech_clip_timestamps(speech_segments) if speech_segments else None
+        
+        # Same decoding as the sequential path, except condition_on_previous_text:
+        # batched chunks are decoded independently, so there is no previous text.
+        # Timestamp tokens stay on so each chunk still splits into sentence-level
+        # segments (the batched pipeline defaults to one segment per chunk).
+        batched_options = dict(
             beam_size=5,
             best_of=5,
             temperature=0.0,
-            condition_on_previous_text=True,
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=500)
+            without_timestamps=False,
+            batch_size=self.batch_size
         )
         
+        if self._use_batched_inference() and clip_timestamps:
+            # Decode the known speech regions as batches, skipping the VAD pass
+            segments_generator, info = self.batched_model.transcribe(
+                audio_float32,
+                clip_timestamps=clip_timestamps,
+                **batched_options
+            )
+        elif self._use_batched_inference():
+            # VAD-split the audio and decode the chunks as batches on one encoder call each
+            segments_generator, info = self.batched_model.transcribe(
+                audio_float32,
+                vad_filter=True,
+                vad_parameters=dict(min_silence_duration_ms=500),
+                **batched_options
+            )
+        else:
+            segments_generator, info = self.model.transcribe(
+                audio_float32,
+                beam_size=5,
+                best_of=5,
+                temperature=0.0,
+                condition_on_previous_text=True,
+                vad_filter=True,
+                vad_parameters=dict(min_silence_duration_ms=500)
+            )
+        
         logger.debug(f"Detected language: {info.language} "
                     f"(probability: {info.language_probability:.2f})")
         
@@ -224,38 +341,40 @@ class Transcription:
     
     def _transcribe_openai_whisper(self, audio_data: np.ndarray, sample_rate: int) -> List[Dict]:
         """Transcribe using openai-whisper"""
-        # Save audio to temporary file for whisper
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_path = temp_file.name
+        # Whisper takes the waveform directly, no temp WAV write + ffmpeg re-decode
+        audio_float32 = self._prepare_audio(audio_data, sample_rate)
         
-        try:
-            # Save audio
-            import soundfile as sf
-            sf.write(temp_path, audio_data, sample_rate)
-            
-            # Transcribe
-            result = self.model.transcribe(
-                temp_path,
-                verbose=False,
-                word_timestamps=False  # We don't need word-level for this pipeline
-            )
-            
-            segments = []
-            for segment in result['segments']:
-                segments.append({
-                    'start': segment['start'],
-                    'end': segment['end'],
-                    'text': segment['text'].strip(),
-                    'no_speech_prob': segment.get('no_speech_prob', 0.0),
-                    'avg_logprob': segment.get('avg_logprob', 0.0),
-                    'compression_ratio': segment.get('compression_ratio', 0.0)
-                })
-            
-            return segments
-            
-        finally:
-            # Clean up temporary file
-            Path(temp_path).unlink(missing_ok=True)
+        # Transcribe
+        result = self.model.transcribe(
+            audio_float32,
+            verbose=False,
+            word_timestamps=False,  # We don't need word-level for this pipeline
+            fp16=self.device == "cuda"  # FP16 decoding is GPU-only
+        )
+        
+        segments = []
+        for segment in result['segments']:
+            segments.append({
+                'start': segment['start'],
+                'end': segment['end'],
+                'text': segment['text'].strip(),
+                'no_speech_prob': segment.get('no_speech_prob', 0.0),
+                'avg_logprob': segment.get('avg_logprob', 0.0),
+                'compression_ratio': segment.get('compression_ratio', 0.0)
+            })
+        
+        return segments
+    
+    def _prepare_audio(self, audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Return contiguous 16kHz float32 audio, the in-memory format both Whisper backends expect"""
+        audio_float32 = np.ascontiguousarray(audio_data, dtype=np.float32)
+        
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            from scipy.signal import resample_poly
+            logger.debug(f"Resampling audio from {sample_rate}Hz to {WHISPER_SAMPLE_RATE}Hz for Whisper")
+            audio_float32 = resample_poly(audio_float32, WHISPER_SAMPLE_RATE, sample_rate).astype(np.float32)
+        
+        return audio_float32
     
     def _post_process_segments(self, segments: List[Dict]) -> List[Dict]:
         """Post-process transcript segments - preserve all segments with text data"""
@@ -369,11 +488,10 @@ class Transcription:
         Returns:
             List of transcript segments
         """
-        from pipeline.audio_ingestion import AudioIngestion
+        from pipeline.audio_ingestion import load_audio_once
         
-        # Load and normalize audio
-        ingestion = AudioIngestion()
-        audio_data, sample_rate = ingestion.load_and_normalize(audio_path)
+        # Load and normalize audio (reused if another helper already decoded this file)
+        audio_data, sample_rate = load_audio_once(audio_path)
         
         # Transcribe
         return self.transcribe_audio(audio_data, sample_rate)
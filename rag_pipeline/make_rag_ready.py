@@ -1,14 +1,32 @@
 import json
 import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Paths
 BASE_EPISODES = os.path.join('data', 'episodes')
 
 # Helper to load JSON
 def load_json(path):
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+# Helper to save JSON; orjson encodes to UTF-8 bytes in C instead of
+# formatting every float and string in Python
+def save_json(data, path):
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
 def process_episode(episode_dir):
     summ_path = os.path.join(episode_dir, 'summarization.json')
     final_path = os.path.join(episode_dir, 'final_report.json')
@@ -72,8 +90,7 @@ def process_episode(episode_dir):
         'blocks': blocks
     }
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(rag_ready, f, ensure_ascii=False, indent=2)
+    save_json(rag_ready, output_path)
     print(f"Created: {output_path}")
 
 def main():
@@ -0,0 +1,55 @@
+"""
+Tests for the running-count box filter in the noise gate
+
+The reference is the original np.convolve(mask, ones(k) / k, mode='same')
+smoothing, computed in float64.
+"""
+
+import numpy as np
+import pytest
+
+from pipeline.audio_ingestion import AudioIngestion
+
+
+def _gate(target_sample_rate):
+    # The noise gate only reads target_sample_rate; skip the output-directory setup
+    ingestion = object.__new__(AudioIngestion)
+    ingestion.target_sample_rate = target_sample_rate
+    return ingestion
+
+
+def _reference_gate(audio, kernel_size, threshold):
+    """Original convolution-based gate, aligned like mode='same' but always N samples long"""
+    mask = (np.abs(audio) > threshold).astype(np.float64)
+    full = np.convolve(mask, np.ones(kernel_size) / kernel_size, mode='full')
+    # mode='same' is the full convolution from offset (k - 1) // 2 for N >= k
+    offset = (kernel_size - 1) // 2
+    return audio * mask * full[offset:offset + len(audio)]
+
+
+@pytest.mark.parametrize("kernel_size", [2, 3, 5, 7, 16])
+@pytest.mark.parametrize("n_samples", [1, 2, 4, 6, 15, 16, 17, 100, 1001])
+def test_noise_gate_matches_convolution(kernel_size, n_samples):
+    rng = np.random.default_rng(kernel_size * 10000 + n_samples)
+    audio = rng.uniform(-0.05, 0.05, n_samples).astype(np.float32)
+    ingestion = _gate(kernel_size * 1000)
+    assert int(0.001 * ingestion.target_sample_rate) == kernel_size
+    
+    gated = ingestion._apply_noise_gate(audio, threshold=0.01)
+    
+    assert gated.dtype == np.float32
+    assert gated.shape == audio.shape
+    np.testing.assert_allclose(gated, _reference_gate(audio.astype(np.float64), kernel_size, 0.01), atol=1e-6)
+    if n_samples >= kernel_size:
+        # Same output as mode='same' itself where that keeps the input length
+        mask = (np.abs(audio) > 0.01).astype(np.float64)
+        same = np.convolve(mask, np.ones(kernel_size) / kernel_size, mode='same')
+        np.testing.assert_allclose(gated, audio * mask * same, atol=1e-6)
+
+
+def test_noise_gate_without_smoothing_only_masks():
+    audio = np.array([0.5, 0.001, -0.2, -0.005], dtype=np.float32)
+    
+    gated = _gate(1000)._apply_noise_gate(audio, threshold=0.01)
+    
+    np.testing.assert_array_equal(gated, np.array([0.5, 0.0, -0.2, 0.0], dtype=np.float32))
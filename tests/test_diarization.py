@@ -0,0 +1,195 @@
+"""
+Equivalence tests for the vectorized speaker alignment
+
+The searchsorted/bincount implementations are checked against plain
+O(N * M) loops on randomized diarizations with nested and touching turns.
+"""
+
+import numpy as np
+import pytest
+
+from pipeline.diarization import SpeakerDiarization, candidate_turn_windows
+from pipeline.pipeline_runner import PipelineRunner
+
+
+def _random_turns(rng, n_turns, speakers=("A", "B", "C")):
+    """Turns on a half-second grid, so nesting, touching and exact ties are common"""
+    turns = []
+    for _ in range(n_turns):
+        start = rng.integers(0, 60) / 2
+        turns.append({
+            'start_time': start,
+            'end_time': start + rng.integers(1, 20) / 2,
+            'speaker': str(rng.choice(speakers)),
+            'confidence': round(float(rng.uniform(0.1, 1.0)), 3)
+        })
+    return turns
+
+
+def _random_segments(rng, n_segments):
+    """Transcript segments on the same grid, including zero-length ones"""
+    segments = []
+    for i in range(n_segments):
+        start = rng.integers(0, 70) / 2
+        segments.append({
+            'segment_id': i + 1,
+            'start_time': start,
+            'end_time': start + rng.integers(0, 12) / 2,
+            'text': "word " * int(rng.integers(1, 8))
+        })
+    return segments
+
+
+def _reference_align(turns, segments):
+    """(speaker, confidence, overlap_ratio) per segment from a plain double loop"""
+    speakers = sorted({turn['speaker'] for turn in turns})
+    aligned = []
+    for segment in segments:
+        start, end = segment['start_time'], segment['end_time']
+        overlaps = [max(0.0, min(end, turn['end_time']) - max(start, turn['start_time'])) for turn in turns]
+        totals = dict.fromkeys(speakers, 0.0)
+        for turn, overlap in zip(turns, overlaps):
+            totals[turn['speaker']] += overlap
+        
+        duration = end - start
+        # max() keeps the first maximum: ties go to the first speaker in sorted order
+        best = max(speakers, key=totals.get) if speakers else None
+        ratio = totals[best] / duration if best is not None and duration > 0 else 0.0
+        if ratio > 0:
+            # Longest overlapping turn of the winner, first in input order on ties
+            best_turn = max((j for j, turn in enumerate(turns) if turn['speaker'] == best),
+                            key=lambda j: overlaps[j])
+            aligned.append((best, turns[best_turn]['confidence'], min(ratio, 1.0)))
+        else:
+            aligned.append(('Unknown', 0.0, 0.0))
+    return aligned
+
+
+def _reference_enrich(transcription_segments, diarization_segments):
+    """Speaker enrichment with the original list-comprehension overlap filter"""
+    enriched_segments = []
+    for trans_seg in transcription_segments:
+        t_start, t_end, t_text = trans_seg['start_time'], trans_seg['end_time'], trans_seg['text']
+        overlapping = [d for d in diarization_segments
+                       if not (d['end_time'] <= t_start or d['start_time'] >= t_end)]
+        if len(overlapping) <= 1:
+            speaker = overlapping[0].get('speaker', 'Unknown') if overlapping else 'Unknown'
+            confidence = overlapping[0].get('confidence', 0.0) if overlapping else 0.0
+            enriched_segments.append((t_start, t_end, t_text, speaker, confidence))
+            continue
+        seg_start = t_start
+        for dia_seg in overlapping:
+            seg_end = min(t_end, dia_seg['end_time'])
+            prop = (seg_end - seg_start) / (t_end - t_start) if t_end > t_start else 1.0
+            sub_text_len = int(len(t_text) * prop)
+            sub_text, t_text = t_text[:sub_text_len], t_text[sub_text_len:]
+            enriched_segments.append((seg_start, seg_end, sub_text, dia_seg['speaker'], dia_seg['confidence']))
+            seg_start = seg_end
+    return enriched_segments
+
+
+@pytest.fixture
+def diarizer():
+    # Alignment needs no pyannote pipeline, so skip the model-loading constructor
+    return object.__new__(SpeakerDiarization)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_candidate_turn_windows_cover_every_overlapping_turn(seed):
+    rng = np.random.default_rng(seed)
+    turns = _random_turns(rng, int(rng.integers(1, 30)))
+    segments = _random_segments(rng, 25)
+    d_starts = np.array([t['start_time'] for t in turns])
+    d_ends = np.array([t['end_time'] for t in turns])
+    t_starts = np.array([s['start_time'] for s in segments])
+    t_ends = np.array([s['end_time'] for s in segments])
+    
+    order, lo, hi = candidate_turn_windows(d_starts, d_ends, t_starts, t_ends)
+    
+    for i in range(len(segments)):
+        window = set(order[lo[i]:hi[i]].tolist())
+        overlapping = {j for j in range(len(turns)) if d_starts[j] < t_ends[i] and d_ends[j] > t_starts[i]}
+        assert overlapping <= window
+        # Every turn in the window starts before the segment ends
+        assert all(d_starts[j] < t_ends[i] for j in window)
+
+
+def test_candidate_turn_windows_nested_and_touching_turns():
+    # Turn 0 contains turn 1; turn 2 touches turn 0's end
+    d_starts = np.array([0.0, 1.0, 5.0])
+    d_ends = np.array([5.0, 2.0, 8.0])
+    order, lo, hi = candidate_turn_windows(d_starts, d_ends, np.array([3.0, 5.0]), np.array([4.0, 6.0]))
+    
+    # The nested turn ends before 3.0 but stays in the window (callers filter it);
+    # the long outer turn must not be dropped
+    assert 0 in order[lo[0]:hi[0]]
+    assert 2 not in order[lo[0]:hi[0]]
+    # A segment starting exactly where turn 0 ends only overlaps turn 2
+    assert set(order[lo[1]:hi[1]].tolist()) >= {2}
+    assert 0 not in order[lo[1]:hi[1]]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_align_with_transcript_matches_reference(diarizer, seed):
+    rng = np.random.default_rng(seed)
+    turns = _random_turns(rng, int(rng.integers(1, 25)))
+    segments = _random_segments(rng, 30)
+    
+    aligned = diarizer.align_with_transcript(turns, segments)
+    
+    assert [s['segment_id'] for s in aligned] == [s['segment_id'] for s in segments]
+    for result, (speaker, confidence, ratio) in zip(aligned, _reference_align(turns, segments)):
+        assert result['speaker'] == speaker
+        assert result['speaker_confidence'] == confidence
+        assert result['overlap_ratio'] == pytest.approx(ratio)
+
+
+def test_align_with_transcript_empty_inputs(diarizer):
+    segments = [{'segment_id': 1, 'start_time': 0.0, 'end_time': 1.0, 'text': 'hi'}]
+    
+    aligned = diarizer.align_with_transcript([], segments)
+    
+    assert aligned[0]['speaker'] == 'Unknown'
+    assert aligned[0]['speaker_confidence'] == 0.0
+    assert aligned[0]['overlap_ratio'] == 0.0
+    assert diarizer.align_with_transcript(_random_turns(np.random.default_rng(0), 3), []) == []
+
+
+def test_align_with_transcript_zero_length_segment_is_unknown(diarizer):
+    turns = [{'start_time': 0.0, 'end_time': 4.0, 'speaker': 'A', 'confidence': 0.9}]
+    segments = [{'segment_id': 1, 'start_time': 2.0, 'end_time': 2.0, 'text': ''}]
+    
+    assert diarizer.align_with_transcript(turns, segments)[0]['speaker'] == 'Unknown'
+
+
+def test_align_with_transcript_tie_breaks(diarizer):
+    turns = [
+        # B is listed first but ties with A on summed overlap: the sorted-first speaker wins
+        {'start_time': 2.0, 'end_time': 4.0, 'speaker': 'B', 'confidence': 0.2},
+        {'start_time': 1.0, 'end_time': 2.0, 'speaker': 'A', 'confidence': 0.7},
+        {'start_time': 0.0, 'end_time': 1.0, 'speaker': 'A', 'confidence': 0.9},
+    ]
+    segments = [{'segment_id': 1, 'start_time': 0.0, 'end_time': 4.0, 'text': 'x'}]
+    
+    aligned = diarizer.align_with_transcript(turns, segments)[0]
+    
+    assert aligned['speaker'] == 'A'
+    # A's two turns overlap equally: confidence comes from the first one in input order
+    assert aligned['speaker_confidence'] == 0.7
+    assert aligned['overlap_ratio'] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_enrich_segments_with_speakers_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    turns = _random_turns(rng, int(rng.integers(0, 25)))
+    segments = _random_segments(rng, 30)
+    runner = object.__new__(PipelineRunner)
+    
+    enriched = runner._enrich_segments_with_speakers(segments, turns)
+    
+    assert [
+        (s['start_time'], s['end_time'], s['text'], s['speaker'], s['speaker_confidence'])
+        for s in enriched
+    ] == _reference_enrich(segments, turns)
+    assert [s['segment_id'] for s in enriched] == list(range(1, len(enriched) + 1))
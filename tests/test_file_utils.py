@@ -0,0 +1,46 @@
+"""
+Tests for JSON persistence in FileUtils
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import utils.file_utils as file_utils_module
+from utils.file_utils import FileUtils
+
+
+def _sample_result():
+    return {
+        'scores': [1.5, float('nan'), float('inf'), -float('inf')],
+        'nested': {'value': np.float32(0.25), 'array': np.array([1.0, np.nan])},
+        'empty': [],
+        'text': 'café',
+        'missing': None
+    }
+
+
+@pytest.mark.skipif(file_utils_module.orjson is None, reason="orjson not installed")
+def test_save_json_writes_identical_files_with_and_without_orjson(tmp_path, monkeypatch):
+    file_utils = FileUtils(base_dir=str(tmp_path / "output"))
+    file_utils.save_json(_sample_result(), tmp_path / "orjson.json")
+    
+    monkeypatch.setattr(file_utils_module, "orjson", None)
+    file_utils.save_json(_sample_result(), tmp_path / "stdlib.json")
+    
+    assert (tmp_path / "orjson.json").read_bytes() == (tmp_path / "stdlib.json").read_bytes()
+
+
+def test_save_json_stdlib_fallback_writes_null_for_non_finite(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils_module, "orjson", None)
+    file_utils = FileUtils(base_dir=str(tmp_path / "output"))
+    
+    file_utils.save_json(_sample_result(), tmp_path / "result.json")
+    
+    def reject(constant):
+        raise ValueError(f"non-standard JSON constant {constant}")
+    data = json.loads((tmp_path / "result.json").read_text(encoding='utf-8'), parse_constant=reject)
+    assert data['scores'] == [1.5, None, None, None]
+    assert data['nested'] == {'value': 0.25, 'array': [1.0, None]}
+    assert file_utils.load_json(tmp_path / "result.json") == data
@@ -0,0 +1,68 @@
+"""
+Tests for key topic selection in semantic segmentation
+"""
+
+import numpy as np
+
+from pipeline.semantic_segmentation import SemanticSegmentation
+
+
+class _RecordingEncoder:
+    """Stand-in sentence encoder returning a fixed unit vector per phrase"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def encode(self, phrases, **kwargs):
+        self.calls.append(list(phrases))
+        vectors = np.array([[len(p), sum(map(ord, p)) % 7 + 1, 1.0] for p in phrases], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _segmenter(embedding_key_topics=False):
+    # Topic extraction needs no loaded model; skip the device and output-directory setup
+    segmenter = object.__new__(SemanticSegmentation)
+    segmenter.embedding_key_topics = embedding_key_topics
+    segmenter.batch_size = 64
+    segmenter.embedding_model = _RecordingEncoder()
+    segmenter._segment_embeddings = np.eye(3, dtype=np.float32)
+    return segmenter
+
+
+def test_tfidf_topics_favour_block_specific_repeated_words():
+    texts = [
+        "apple apple banana banana cherry",
+        "apple apple delta delta delta"
+    ]
+    
+    topics = _segmenter()._extract_key_topics_by_tfidf(texts)
+    
+    # 'apple' is in both blocks so it ranks below each block's own word;
+    # 'cherry' occurs once and is dropped
+    assert topics == [["banana", "apple"], ["delta", "apple"]]
+
+
+def test_tfidf_topics_break_ties_alphabetically_before_truncating():
+    text = " ".join(word + " " + word for word in ["zulu", "mango", "kilo", "echo", "golf", "papa"])
+    
+    assert _segmenter()._extract_key_topics_by_tfidf([text]) == [["echo", "golf", "kilo", "mango", "papa"]]
+
+
+def test_key_topics_use_tfidf_by_default():
+    segmenter = _segmenter()
+    texts = ["river river stone stone", "cloud cloud river river"]
+    
+    topics = segmenter._extract_key_topics_batch(texts, [[0, 1], [2]])
+    
+    assert segmenter.embedding_model.calls == []
+    assert topics == segmenter._extract_key_topics_by_tfidf(texts)
+
+
+def test_key_topics_use_embeddings_when_enabled():
+    segmenter = _segmenter(embedding_key_topics=True)
+    texts = ["river river stone stone", "cloud cloud river river"]
+    
+    topics = segmenter._extract_key_topics_batch(texts, [[0, 1], [2]])
+    
+    assert len(segmenter.embedding_model.calls) == 1
+    assert all(topics) and topics == segmenter._extract_key_topics_batch(texts, [[0, 1], [2]])
@@ -4,6 +4,7 @@ Handles file operations, caching, and data persistence.
 """
 
 import json
+import math
 import pickle
 import hashlib
 import shutil
@@ -18,6 +19,29 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json
+    orjson = None
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if orjson is not None else 0
+)
+
+
+def _replace_non_finite(value: Any) -> Any:
+    """Copy of JSON-bound data with NaN/Infinity replaced by None, as orjson writes them"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _replace_non_finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_non_finite(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return _replace_non_finite(value.tolist())
+    return value
+
 
 class FileUtils:
     """Utility class for file operations and caching"""
@@ -78,8 +102,21 @@ class FileUtils:
         file_path = Path(file_path)
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # orjson encodes straight to UTF-8 bytes in C and handles numpy types natively
+        if orjson is not None:
+            try:
+                payload = orjson.dumps(data, default=str, option=_ORJSON_OPTIONS)
+                with open(file_path, 'wb') as f:
+                    f.write(payload)
+                logger.debug(f"Saved JSON to: {file_path}")
+                return
+            except TypeError as e:
+                logger.debug(f"orjson could not encode {file_path}, using json: {e}")
+        
+        # Same output as orjson: non-finite floats become null rather than bare NaN
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+            json.dump(_replace_non_finite(data), f, indent=2, ensure_ascii=False,
+                      default=str, allow_nan=False)
         
         logger.debug(f"Saved JSON to: {file_path}")
     
@@ -100,8 +137,18 @@ class FileUtils:
             return None
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                payload = f.read()
+            
+            data = None
+            if orjson is not None:
+                try:
+                    data = orjson.loads(payload)
+                except orjson.JSONDecodeError:
+                    # orjson rejects NaN/Infinity, which stdlib json writes and reads
+                    data = None
+            if data is None:
+                data = json.loads(payload.decode('utf-8'))
             
             logger.debug(f"Loaded JSON from: {file_path}")
             return data
@@ -110,6 +157,47 @@ class FileUtils:
             logger.error(f"Error loading JSON from {file_path}: {e}")
             return None
     
+    def save_array(self, array: np.ndarray, file_path: Union[str, Path]) -> None:
+        """
+        Save numpy array as binary .npy file
+        
+        Args:
+            array: Array to save
+            file_path: Path to save the file
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        np.save(file_path, np.asarray(array), allow_pickle=False)
+        logger.debug(f"Saved array to: {file_path}")
+    
+    def load_array(self, file_path: Union[str, Path],
+                   mmap_mode: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Load numpy array from .npy file
+        
+        Args:
+            file_path: Path to the .npy file
+            mmap_mode: Memory-map mode (e.g. "r") to avoid reading the whole file
+            
+        Returns:
+            Loaded array or None if file doesn't exist
+        """
+        file_path = Path(file_path)
+        
+        if not file_path.exists():
+            logger.warning(f"Array file not found: {file_path}")
+            return None
+        
+        try:
+            array = np.load(file_path, mmap_mode=mmap_mode, allow_pickle=False)
+            logger.debug(f"Loaded array from: {file_path}")
+            return array
+        
+        except Exception as e:
+            logger.error(f"Error loading array from {file_path}: {e}")
+            return None
+    
     def save_pickle(self, data: Any, file_path: Union[str, Path]) -> None:
         """
         Save data as pickle file
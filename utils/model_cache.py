@@ -0,0 +1,86 @@
+"""
+Process-wide model cache for the podcast analysis pipeline.
+Keeps loaded models in memory so repeated pipeline runs skip the load cost.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Loaded models keyed by (model kind, model name, device, ...)
+_models: Dict[Hashable, Any] = {}
+
+# One lock per key, so concurrent loads of different models don't wait on each other
+# while two threads asking for the same model load it only once
+_key_locks: Dict[Hashable, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def _lock_for(key: Hashable) -> threading.Lock:
+    """Get the load lock for a cache key"""
+    with _registry_lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def get_cached_model(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    Get a loaded model, creating it with factory on first use
+
+    Args:
+        key: Unique cache key, e.g. ("whisper", "medium", "cuda")
+        factory: Zero-argument callable that loads the model
+
+    Returns:
+        Cached model object
+
+    Exceptions raised by factory propagate and nothing is cached,
+    so callers can fall back and retry on a later run.
+    """
+    if key in _models:
+        logger.debug(f"Reusing cached model: {key}")
+        return _models[key]
+
+    with _lock_for(key):
+        # Another thread may have finished loading while we waited
+        if key in _models:
+            logger.debug(f"Reusing cached model: {key}")
+            return _models[key]
+
+        model = factory()
+        _models[key] = model
+        return model
+
+
+def clear_model_cache(kind: Optional[str] = None) -> int:
+    """
+    Drop cached models so their memory can be reclaimed
+
+    Args:
+        kind: Only drop models whose key starts with this kind (e.g. "whisper");
+            drops everything when None
+
+    Returns:
+        Number of models removed
+    """
+    with _registry_lock:
+        keys = [
+            key for key in _models
+            if kind is None or (isinstance(key, tuple) and key and key[0] == kind)
+        ]
+        for key in keys:
+            del _models[key]
+
+    if keys:
+        logger.info(f"Cleared {len(keys)} cached model(s)")
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    return len(keys)